@@ -1,19 +1,40 @@
 """Streamlit UI for AI Strategy Consultant Agent."""
 
-import nest_asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
-nest_asyncio.apply()
 import asyncio
 import os
-from typing import Any, Dict
+import queue
+import time
+import uuid
+from concurrent.futures import CancelledError
+from typing import IO, Any, Callable, Dict, Optional, Union
 
 import streamlit as st
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 
+from src.artifacts import get_artifact_store
+from src.conversation_store import get_conversation_store
+from src.config import config
 from src.graph import graph
+from src.ingest import (
+    SUPPORTED_TYPES,
+    DocumentError,
+    DocumentIntake,
+    extract_document_profile,
+)
+from src.intake import FORM_LABELS, IntakeForm, intake_metrics
+from src.loop_governor import loop_governor
+from src.overload import overload_controller
+from src.profiling import TurnProfiler, profiler_for_turn
+from src.runtime import get_runtime
+from src.session_index import preload_session_store
+from src.snapshots import snapshots_for_turn
 from src.state import State
+from src.tool import PPTX_MIME
+from src.tracing import tracer_for_turn
+from src.turns import Turn, turn_manager
 
 # Page configuration
 st.set_page_config(
@@ -63,98 +84,265 @@ st.markdown(
 )
 
 
-# Initialize session state
-def init_session_state():
-    """Initialize all session state variables."""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "problem_profile" not in st.session_state:
-        st.session_state.problem_profile = {
+def new_conversation() -> Dict[str, Any]:
+    """Default conversation state of a new session."""
+    return {
+        "messages": [],
+        "problem_profile": {
             "pain_point": None,
             "goal": None,
-        }
-    if "reflection_result" not in st.session_state:
-        st.session_state.reflection_result = {
+        },
+        "reflection_result": {
             "is_complete": False,
             "missing_fields": [],
-        }
-    if "is_passing_evaluation" not in st.session_state:
-        st.session_state.is_passing_evaluation = False
-    if "conversation_started" not in st.session_state:
-        st.session_state.conversation_started = False
-    if "show_greeting" not in st.session_state:
-        st.session_state.show_greeting = True
-    if "evaluation_result" not in st.session_state:
-        st.session_state.evaluation_result = {
+        },
+        "is_passing_evaluation": False,
+        "evaluation_result": {
             "score": 0,
             "critique": "",
             "advice": "",
             "missing_fields": [],
-        }
-    if "job_title" not in st.session_state:
-        st.session_state.job_title = None
-    if "cross_silo_evaluation" not in st.session_state:
-        st.session_state.cross_silo_evaluation = {
+        },
+        "evaluated_profile_hashes": {},
+        "job_title": None,
+        "cross_silo_evaluation": {
             "result": "",
             "advice": "",
             "score": 0,
-        }
-    if "node_status" not in st.session_state:
-        st.session_state.node_status = "example"
-    if "last_stage" not in st.session_state:
-        st.session_state.last_stage = ""
-    if "final_summary" not in st.session_state:
-        st.session_state.final_summary = None
-    if "hmw_output" not in st.session_state:
-        st.session_state.hmw_output = None
+        },
+        "department_perspectives": [],
+        "loop_counts": {},
+        "loop_questions": {},
+        "best_evaluation": {},
+        "node_status": "example",
+        "last_stage": "",
+        "final_summary": None,
+        "hmw_output": None,
+        # Whether the last turn ran with the degraded (load-shedding) profile
+        "degraded": False,
+        # Turns and LLM calls it took to reach the first scored profile
+        "intake": {"mode": None, "turns": 0, "llm_calls": 0, "scored": False},
+    }
+
+
+# One event loop in a background thread runs every session's turns
+runtime = get_runtime()
+# Build the similar-session index off the event loop before the first turn needs it
+preload_session_store()
+
+# Conversation state lives in a memory-bounded store, not in st.session_state
+conversation_store = get_conversation_store(new_conversation)
+
+
+def get_conversation() -> Dict[str, Any]:
+    """Conversation state of the current session (rehydrated if spilled)."""
+    return conversation_store.get(st.session_state.session_id)
+
+
+# Initialize session state
+def init_session_state():
+    """Initialize all session state variables."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "conversation_started" not in st.session_state:
+        st.session_state.conversation_started = False
+    if "show_greeting" not in st.session_state:
+        st.session_state.show_greeting = True
+    if "intake_mode" not in st.session_state:
+        st.session_state.intake_mode = config.intake_mode
 
 
 def reset_conversation():
     """Reset the conversation to start fresh."""
-    st.session_state.messages = []
-    st.session_state.problem_profile = {
-        "pain_point": None,
-        "goal": None,
-    }
-    st.session_state.job_title = None
-    st.session_state.reflection_result = {
-        "is_complete": False,
-        "missing_fields": [],
-    }
-    st.session_state.is_passing_evaluation = False
+    conversation_store.put(st.session_state.session_id, new_conversation())
     st.session_state.conversation_started = False
     st.session_state.show_greeting = True
-    st.session_state.cross_silo_evaluation = {
-        "result": "",
-        "advice": "",
-        "score": 0,
-    }
-    st.session_state.node_status = "example"
-    st.session_state.last_stage = ""
-    st.session_state.final_summary = ""
-    st.session_state.hmw_output = ""
     st.rerun()
 
 
-async def process_user_input(user_message: str) -> Dict[str, Any]:
-    """Process user input through the agent graph."""
+async def run_graph(
+    state: State,
+    turn: Turn,
+    run_config: Dict[str, Any],
+    events: "queue.Queue",
+    profiler: Optional[TurnProfiler] = None,
+) -> Optional[Dict[str, Any]]:
+    """Run the graph on the background loop, pushing UI events to the queue."""
+    turn_manager.attach(turn, asyncio.current_task())
+    if profiler is not None:
+        # Only this turn's tasks are recorded by the profiler
+        profiler.bind()
+    result = None
+    try:
+        # Stream node updates and report sections as they complete
+        async for mode, chunk in graph.astream(
+            state,
+            stream_mode=["custom", "updates", "values"],
+            config=run_config,
+        ):
+            if not turn_manager.is_current(turn):
+                raise asyncio.CancelledError
+            if mode == "values":
+                result = chunk
+            elif mode == "updates":
+                events.put(("node", next(iter(chunk), "")))
+            elif "final_summary_section" in chunk:
+                events.put(("section", chunk["content"]))
+    except asyncio.CancelledError:
+        return None
+    return result
+
+
+def process_user_input(
+    user_message: str,
+    turn: Turn,
+    on_section: Optional[Callable[[str], None]] = None,
+    on_node: Optional[Callable[[str], None]] = None,
+    on_idle: Optional[Callable[[], None]] = None,
+    what_if: bool = False,
+    intake: Optional[Union[IntakeForm, DocumentIntake]] = None,
+    document: Optional[IO[bytes]] = None,
+    profiler: Optional[TurnProfiler] = None,
+) -> Optional[Dict[str, Any]]:
+    """Process user input through the agent graph.
+
+    The turn runs on the shared background loop; this script thread only
+    renders its events. Returns None when the turn is cancelled by a newer
+    message; raises DocumentError when an uploaded document cannot be read.
+    """
+    callbacks = [turn.counter]
+    tracer = tracer_for_turn(st.session_state.session_id)
+    if tracer is not None:
+        callbacks.append(tracer)
+
+    if document is not None:
+        # Chunks of the document are extracted concurrently on the background loop
+        intake = runtime.submit(
+            extract_document_profile(document, document.name, callbacks)
+        ).result()
+        user_message = intake.message()
+
     # Create state with current context
+    conversation = get_conversation()
+    if intake is not None:
+        # A form or document fills the profile directly; the graph starts at
+        # evaluation when nothing is missing
+        profile = intake.profile()
+        missing_fields = [k for k, v in profile.items() if not v]
+        conversation = {
+            **conversation,
+            "problem_profile": profile,
+            "job_title": intake.job_title.strip() or conversation["job_title"],
+            "reflection_result": {
+                "is_complete": not missing_fields,
+                "missing_fields": missing_fields,
+                "advice": "",
+            },
+        }
     state = State(
-        messages=st.session_state.messages + [HumanMessage(content=user_message)],
-        problem_profile=st.session_state.problem_profile,
-        reflection_result=st.session_state.reflection_result,
-        is_passing_evaluation=st.session_state.is_passing_evaluation,
-        job_title=st.session_state.job_title,
-        cross_silo_evaluation=st.session_state.cross_silo_evaluation,
-        node_status=st.session_state.node_status,
-        last_stage=st.session_state.last_stage,
-        final_summary=st.session_state.final_summary,
-        hmw_output=st.session_state.hmw_output,
+        messages=conversation["messages"] + [HumanMessage(content=user_message)],
+        problem_profile=conversation["problem_profile"],
+        reflection_result=conversation["reflection_result"],
+        is_passing_evaluation=conversation["is_passing_evaluation"],
+        evaluation_result=conversation["evaluation_result"],
+        evaluated_profile_hashes=conversation.get("evaluated_profile_hashes", {}),
+        job_title=conversation["job_title"],
+        cross_silo_evaluation=conversation["cross_silo_evaluation"],
+        department_perspectives=conversation["department_perspectives"],
+        loop_counts=conversation.get("loop_counts", {}),
+        loop_questions=conversation.get("loop_questions", {}),
+        best_evaluation=conversation.get("best_evaluation", {}),
+        node_status=conversation["node_status"],
+        last_stage=conversation["last_stage"],
+        final_summary=conversation["final_summary"],
+        hmw_output=conversation["hmw_output"],
+        degraded=overload_controller.profile_for(st.session_state.session_id),
+        what_if_requested=what_if,
+        intake_form=intake is not None and intake.is_complete,
+    )
+
+    # Node snapshots cover the graph run only, not the document extraction
+    snapshots = snapshots_for_turn(st.session_state.session_id)
+    if snapshots is not None:
+        callbacks = callbacks + [snapshots]
+
+    events: queue.Queue = queue.Queue()
+    run_config = {
+        "callbacks": callbacks,
+        # Tools store generated files under this session's namespace
+        "configurable": {"session_id": st.session_state.session_id},
+    }
+    future = runtime.submit(run_graph(state, turn, run_config, events, profiler))
+
+    # Render events until the turn finishes; each st call is also a checkpoint.
+    # on_idle makes an st call while a single node is still running, so a new
+    # message stops this script run and cancels the in-flight LLM call at once.
+    while not future.done() or not events.empty():
+        try:
+            kind, payload = events.get(timeout=0.2)
+        except queue.Empty:
+            if on_idle is not None:
+                on_idle()
+            continue
+        if kind == "node" and on_node is not None:
+            on_node(payload)
+        elif kind == "section" and on_section is not None:
+            on_section(payload)
+
+    try:
+        return future.result()
+    except CancelledError:
+        return None
+
+
+def update_session_state(result: Dict[str, Any], turn: Turn, mode: str):
+    """Copy a finished turn's graph result into the conversation store."""
+    intake = track_intake(result, turn, mode)
+    conversation_store.put(
+        st.session_state.session_id,
+        {
+            "messages": result["messages"],
+            "problem_profile": result["problem_profile"],
+            "reflection_result": result["reflection_result"],
+            "is_passing_evaluation": result["is_passing_evaluation"],
+            "evaluation_result": result["evaluation_result"],
+            "evaluated_profile_hashes": result["evaluated_profile_hashes"],
+            "job_title": result["job_title"],
+            "cross_silo_evaluation": result["cross_silo_evaluation"],
+            "department_perspectives": result.get("department_perspectives", []),
+            "loop_counts": result["loop_counts"],
+            "loop_questions": result["loop_questions"],
+            "best_evaluation": result["best_evaluation"],
+            "node_status": result["node_status"],
+            "last_stage": result["last_stage"],
+            "final_summary": result.get("final_summary", None),
+            "hmw_output": result.get("hmw_output", None),
+            "degraded": result.get("degraded", False),
+            "intake": intake,
+        },
     )
-    # Run the graph asynchronously
-    result = await graph.ainvoke(state)
 
-    return result
+
+def track_intake(result: Dict[str, Any], turn: Turn, mode: str) -> Dict[str, Any]:
+    """Count turns and LLM calls until the session's profile is first scored."""
+    intake = dict(get_conversation().get("intake") or new_conversation()["intake"])
+    if intake["scored"]:
+        return intake
+    intake["mode"] = intake["mode"] or mode
+    intake["turns"] += 1
+    intake["llm_calls"] += turn.counter.started
+    if result["evaluated_profile_hashes"]:
+        intake["scored"] = True
+        intake_metrics.record(intake["mode"], intake["turns"], intake["llm_calls"])
+    return intake
+
+
+def display_what_if_branches(branches: list):
+    """Show the strategy drafts of the ladder questions side by side."""
+    for column, branch in zip(st.columns(len(branches)), branches):
+        with column:
+            st.markdown(f"**🪜 {branch['question']}**")
+            st.markdown(branch["draft"])
 
 
 def display_message(message: Any):
@@ -165,13 +353,32 @@ def display_message(message: Any):
     elif isinstance(message, AIMessage):
         with st.chat_message("assistant", avatar="🤖"):
             st.markdown(message.content)
+            branches = message.additional_kwargs.get("what_if_branches")
+            if branches:
+                display_what_if_branches(branches)
     elif isinstance(message, SystemMessage):
         with st.chat_message("assistant", avatar="🤖"):
             st.markdown(message.content)
     elif isinstance(message, ToolMessage):
         with st.chat_message("assistant", avatar="🤖"):
-            if "成功生成" in message.content and "檔案" in message.content:
-                # Extract filename (support both fullwidth and halfwidth colons)
+            artifact = getattr(message, "artifact", None)
+            if isinstance(artifact, dict) and artifact.get("artifact_id"):
+                data = get_artifact_store().read(
+                    artifact["session_id"], artifact["artifact_id"]
+                )
+                if data is not None:
+                    st.download_button(
+                        label="📥 下載策略報告 PPT",
+                        data=data,
+                        file_name=artifact["filename"],
+                        mime=artifact["mime"],
+                        key=f"download_{artifact['artifact_id']}_{message.id or 'new'}",
+                    )
+                    st.success(f"在此下載您的策略報告簡報：{artifact['filename']}")
+                else:
+                    st.warning("簡報檔案已過期清除，請重新生成")
+            elif "成功生成" in message.content and "檔案" in message.content:
+                # Messages from before the artifact store carry a file path
                 content = message.content
                 if "：" in content:
                     file_path = content.split("：")[-1].strip()
@@ -186,7 +393,7 @@ def display_message(message: Any):
                             label="📥 下載策略報告 PPT",
                             data=file,
                             file_name=os.path.basename(file_path),
-                            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                            mime=PPTX_MIME,
                             key=f"download_{file_path}_{message.id if hasattr(message, 'id') else 'new'}",  # Add unique key
                         )
                     st.success(
@@ -201,6 +408,43 @@ def display_message(message: Any):
             st.markdown(message)
 
 
+def render_document_upload() -> Optional[IO[bytes]]:
+    """Render the document uploader; returns the file once extraction is requested."""
+    with st.expander("📄 從文件擷取問題 (會議記錄、OKR、事件報告)"):
+        document = st.file_uploader("上傳文件", type=SUPPORTED_TYPES)
+        if document is not None and st.button("擷取並評估"):
+            return document
+    return None
+
+
+def render_intake_form() -> Optional[IntakeForm]:
+    """Render the structured intake form; returns the form once submitted complete."""
+    with st.form("intake_form"):
+        st.markdown("📝 **一次填寫問題輪廓**")
+        values = {
+            "job_title": st.text_input(FORM_LABELS["job_title"]),
+            "who": st.text_input(FORM_LABELS["who"], placeholder="例如：業務團隊"),
+            "situation": st.text_input(
+                FORM_LABELS["situation"], placeholder="例如：每週整理客戶報表"
+            ),
+            "obstacle": st.text_area(
+                FORM_LABELS["obstacle"], placeholder="例如：每天花 3 小時處理報表"
+            ),
+            "goal": st.text_input(FORM_LABELS["goal"]),
+            "metric": st.text_input(
+                FORM_LABELS["metric"], placeholder="例如：半年內行政時間減少 50%"
+            ),
+        }
+        if not st.form_submit_button("送出評估"):
+            return None
+    form = IntakeForm(**values)
+    missing = form.missing_fields()
+    if missing:
+        st.warning(f"⚠️ 請補充：{', '.join(missing)}")
+        return None
+    return form
+
+
 def render_sidebar():
     """Render the sidebar with status and controls."""
     with st.sidebar:
@@ -209,7 +453,8 @@ def render_sidebar():
         # Problem Profile Status
         st.subheader("收集資訊進度")
 
-        profile = st.session_state.problem_profile
+        conversation = get_conversation()
+        profile = conversation["problem_profile"]
 
         # Pain Point
         if profile["pain_point"]:
@@ -243,21 +488,66 @@ def render_sidebar():
         st.divider()
         st.subheader("整體評估")
 
-        if st.session_state.is_passing_evaluation:
+        if conversation["is_passing_evaluation"]:
             st.success("✅ 問題定義已達標準！")
-        elif st.session_state.reflection_result["is_complete"]:
+        elif conversation["reflection_result"]["is_complete"]:
             st.info("🔄 資訊已收集完整，正在評估品質...")
         else:
-            missing = st.session_state.reflection_result.get("missing_fields", [])
+            missing = conversation["reflection_result"].get("missing_fields", [])
             if missing:
                 st.warning(f"⚠️ 待補充資訊: {', '.join(missing)}")
             else:
                 st.info("💭 開始對話以收集資訊")
 
+        loop_counts = conversation.get("loop_counts", {})
+        if loop_counts:
+            st.caption(
+                "🔁 "
+                + "、".join(
+                    f"{loop} {count}/{loop_governor.limits[loop]}"
+                    for loop, count in loop_counts.items()
+                )
+            )
+
+        if get_conversation().get("degraded"):
+            st.caption("⚡ 系統忙碌中，上一輪回覆使用精簡模式")
+        if overload_controller.enabled:
+            load = overload_controller.report()
+            st.caption(
+                f"📈 進行中 {load['in_flight']} 個呼叫，p95 {load['p95']}s，"
+                f"降載 {load['degraded_turns']} 輪"
+            )
+            if load["degraded_sessions"]:
+                st.caption(
+                    "最近降載的 session："
+                    + "、".join(
+                        f"{session_id[:8]} ×{count}"
+                        for session_id, count in load["degraded_sessions"]
+                    )
+                )
+        store = conversation_store.stats()
+        st.caption(
+            f"💾 記憶體 {store.resident} 個 session，磁碟 {store.spilled} 個，"
+            f"還原 {store.rehydrations} 次 (平均 {store.avg_rehydrate_ms}ms)"
+        )
+
         # Controls
         st.divider()
         if st.button("🔄 重新開始", use_container_width=True):
             reset_conversation()
+        st.checkbox("🔬 記錄每輪效能 (profiles/)", key="profile_turns")
+        st.radio(
+            "輸入方式",
+            ["chat", "form"],
+            format_func=lambda m: "💬 對話" if m == "chat" else "📝 表單",
+            key="intake_mode",
+            horizontal=True,
+        )
+        for mode, stats in intake_metrics.summary().items():
+            st.caption(
+                f"{mode}: {stats['sessions']} 個 session，平均 {stats['avg_turns']} 輪、"
+                f"{stats['avg_llm_calls']} 次 LLM 呼叫達到評分"
+            )
 
         # Instructions
         st.divider()
@@ -308,12 +598,37 @@ def main():
                 )
 
         # Display conversation history
-        for message in st.session_state.messages:
+        for message in get_conversation()["messages"]:
             display_message(message)
 
         # Chat input
         user_input = st.chat_input("輸入你的訊息...")
 
+        # Form mode collects the whole profile in one submission until it is scored
+        intake = None
+        if (
+            st.session_state.intake_mode == "form"
+            and not get_conversation()["evaluated_profile_hashes"]
+        ):
+            intake = render_intake_form()
+            if intake is not None:
+                user_input = intake.message()
+
+        # Uploaded documents fill the profile until it is scored, in either mode
+        document = None
+        if not get_conversation()["evaluated_profile_hashes"]:
+            document = render_document_upload()
+            if document is not None:
+                user_input = f"📄 {document.name}"
+
+        # Once a report exists, its ladder questions can be drafted in parallel
+        what_if = False
+        if get_conversation()["final_summary"] and st.button(
+            "🪜 試試更窄的版本", help="針對梯級分析的每個問題平行產生策略草稿"
+        ):
+            user_input = "請針對梯級分析往下的問題，各產生一份策略草稿"
+            what_if = True
+
         if user_input:
             st.session_state.conversation_started = True
             st.session_state.show_greeting = False
@@ -322,31 +637,93 @@ def main():
             with st.chat_message("user", avatar="👤"):
                 st.markdown(user_input)
 
+            # Sections of the final report are shown as soon as each one completes
+            section_area = st.empty()
+            streamed_sections = []
+
+            def show_section(content: str):
+                streamed_sections.append(content)
+                with section_area.container():
+                    with st.chat_message("assistant", avatar="🤖"):
+                        st.markdown("\n\n".join(streamed_sections))
+
+            # Node progress doubles as a checkpoint where Streamlit can stop a stale run
+            status_area = st.empty()
+
+            node_path = []
+
+            def show_node(node: str):
+                node_path.append(node)
+                status_area.caption(f"⏳ {node}")
+
+            def show_waiting():
+                elapsed = time.perf_counter() - started
+                status_area.caption(f"⏳ {' → '.join(node_path)} ({elapsed:.0f}s)")
+
+            # A new turn cancels any turn of this session that is still running
+            turn = turn_manager.begin(st.session_state.session_id)
+            started = time.perf_counter()
+            document_error: Optional[DocumentError] = None
+
             # Show thinking indicator
             with st.spinner("🤔 AI 正在思考..."):
-                # Process through agent using existing event loop
-                loop = asyncio.get_event_loop()
-                result = loop.run_until_complete(process_user_input(user_input))
-
-                # Update session state with results
-                st.session_state.messages = result["messages"]
-                st.session_state.problem_profile = result["problem_profile"]
-                st.session_state.reflection_result = result["reflection_result"]
-                st.session_state.is_passing_evaluation = result["is_passing_evaluation"]
-                st.session_state.evaluation_result = result["evaluation_result"]
-                st.session_state.job_title = result["job_title"]
-                st.session_state.cross_silo_evaluation = result["cross_silo_evaluation"]
-                st.session_state.node_status = result["node_status"]
-                st.session_state.last_stage = result["last_stage"]
-                st.session_state.final_summary = result.get("final_summary", None)
-                st.session_state.hmw_output = result.get("hmw_output", None)
-
-                # Display only the latest AI response
-                latest_message = result["messages"][-1]
-                display_message(latest_message)
-
-            # Rerun to update sidebar
-            st.rerun()
+                # Process through agent on the shared background event loop
+                profiler = profiler_for_turn(
+                    st.session_state.session_id,
+                    st.session_state.get("profile_turns", False),
+                )
+                # Profiling is process-wide; skip it while another turn is profiled
+                if profiler is not None and not profiler.start(
+                    runtime.loop, runtime.thread.ident
+                ):
+                    profiler = None
+                    st.caption("🔬 其他對話正在記錄效能，本輪略過")
+                try:
+                    result = process_user_input(
+                        user_input,
+                        turn,
+                        on_section=show_section,
+                        on_node=show_node,
+                        on_idle=show_waiting,
+                        what_if=what_if,
+                        intake=intake,
+                        document=document,
+                        profiler=profiler,
+                    )
+                except DocumentError as e:
+                    # A corrupt or unsupported upload ends the turn with a notice
+                    result = None
+                    document_error = e
+                except BaseException:
+                    # Streamlit interrupts the script when a new message arrives
+                    turn_manager.cancel(turn)
+                    raise
+                finally:
+                    if profiler is not None:
+                        profiler.stop(node_path)
+                section_area.empty()
+                status_area.empty()
+
+                # Update session state with results in one step, unless stale
+                if document is not None:
+                    mode = "document"
+                elif intake is not None:
+                    mode = "form"
+                else:
+                    mode = "chat"
+                if result is not None and turn_manager.commit(
+                    turn, lambda: update_session_state(result, turn, mode)
+                ):
+                    # Display only the latest AI response
+                    latest_message = result["messages"][-1]
+                    display_message(latest_message)
+
+            if document_error is not None:
+                # Keep the notice on screen; nothing changed that the sidebar shows
+                st.warning(f"⚠️ 無法讀取文件「{document.name}」：{document_error}")
+            else:
+                # Rerun to update sidebar
+                st.rerun()
 
     with col2:
         # Quick actions or tips
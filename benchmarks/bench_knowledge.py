@@ -0,0 +1,74 @@
+"""Lookup latency of the department-resource knowledge index against catalog size.
+
+Usage:
+    uv run python -m benchmarks.bench_knowledge [--sizes 100 1000 10000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_session_index import synthetic_session
+from src.knowledge import KnowledgeIndex, ResourceEntry, load_catalog
+
+ROLES = ["業務總監", "客服經理", "營運長", "產品經理", "財務長", "人資主管", "物流經理"]
+DEPARTMENTS = ["業務部", "客服部", "資訊部", "財務部", "人資部", "物流部", "行銷部"]
+KEYWORDS = [
+    "流失", "續約", "報表", "行政", "抱怨", "處理時間", "離職", "培訓",
+    "交期", "庫存", "溝通", "需求", "滿意度", "成本", "訂單", "供應商",
+]
+
+
+def synthetic_entry(rng: random.Random, n: int) -> ResourceEntry:
+    department = rng.choice(DEPARTMENTS)
+    return ResourceEntry(
+        role=rng.choice(ROLES),
+        department=department,
+        keywords=rng.sample(KEYWORDS, 3),
+        resource=f"{department}提供的資源 #{n}",
+        example=f"例子 #{n}",
+    )
+
+
+def bench(size: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "knowledge.sqlite")
+        start = time.perf_counter()
+        load_catalog((synthetic_entry(rng, n) for n in range(size)), db_path)
+        index = KnowledgeIndex.from_sqlite(db_path)
+        build = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(queries):
+        record = synthetic_session(rng)
+        text = " ".join([record["hmw_output"], *record["problem_profile"].values()])
+        start = time.perf_counter()
+        index.lookup(record["job_title"], text)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{size:>8} entries | load {build:7.2f}s | "
+        f"lookup p50 {statistics.median(latencies):8.1f}us "
+        f"p95 {p95:8.1f}us max {latencies[-1]:8.1f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Lookup latency of the similar-session index against corpus size.
+
+Usage:
+    uv run python -m benchmarks.bench_session_index [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from src.session_index import SessionIndex
+
+JOB_TITLES = ["業務總監", "客服經理", "營運長", "產品經理", "財務長", "人資主管", "物流經理"]
+SUBJECTS = ["客戶", "業務團隊", "訂單", "新進員工", "供應商", "門市人員", "工程團隊"]
+PROBLEMS = [
+    "流失率很高，每季約有 {n}% 不再續約",
+    "每天花 {n} 小時處理報表，行政負擔很重",
+    "處理時間平均需要 {n} 天，客戶抱怨不斷",
+    "離職率達到 {n}%，培訓成本持續上升",
+    "交期延誤比例約 {n}%，庫存積壓嚴重",
+    "跨部門溝通要來回 {n} 次才能確認需求",
+]
+GOALS = [
+    "希望半年內降低到 {n}%",
+    "希望每天節省 {n} 小時專注在核心工作",
+    "希望縮短到 {n} 天內完成",
+    "希望一年內提升滿意度 {n} 分",
+]
+
+
+def synthetic_session(rng: random.Random) -> dict:
+    subject = rng.choice(SUBJECTS)
+    pain_point = subject + rng.choice(PROBLEMS).format(n=rng.randint(1, 40))
+    goal = rng.choice(GOALS).format(n=rng.randint(1, 40))
+    return {
+        "job_title": rng.choice(JOB_TITLES),
+        "problem_profile": {"pain_point": pain_point, "goal": goal},
+        "hmw_output": f"在{subject}的情境下，我們如何{goal[2:]}？",
+        "final_summary": "",
+    }
+
+
+def bench(size: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    index = SessionIndex()
+    start = time.perf_counter()
+    for n in range(size):
+        index.add(synthetic_session(rng), n)
+    build = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(queries):
+        record = synthetic_session(rng)
+        query = " ".join(
+            [record["job_title"], *record["problem_profile"].values()]
+        )
+        start = time.perf_counter()
+        index.search(query, k=3)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{size:>8} sessions | build {build:7.2f}s | "
+        f"lookup p50 {statistics.median(latencies):7.2f}ms "
+        f"p95 {p95:7.2f}ms max {latencies[-1]:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
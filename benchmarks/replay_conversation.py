@@ -0,0 +1,50 @@
+"""Run a scripted conversation through the graph and report per-turn latency.
+
+搭配 LLM cassette 使用：先以 record 模式跑一次，之後以 replay 模式離線重跑，
+即可在不同 commit 之間比較圖的執行時間。
+
+Usage:
+    LLM_CASSETTE_MODE=record uv run python -m benchmarks.replay_conversation turns.json
+    LLM_CASSETTE_MODE=replay uv run python -m benchmarks.replay_conversation turns.json
+
+turns.json 為用戶訊息的 JSON 字串陣列。
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from langchain_core.messages import HumanMessage
+
+from src.graph import graph
+from src.state import State
+
+
+async def run(turns: list[str]) -> None:
+    state = State(messages=[])
+    total = 0.0
+    for i, user_message in enumerate(turns, start=1):
+        state = state.model_copy(
+            update={"messages": state.messages + [HumanMessage(content=user_message)]}
+        )
+        start = time.perf_counter()
+        result = await graph.ainvoke(state)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        state = State(**result)
+        print(f"turn {i:>2} | {elapsed * 1000:9.1f}ms | last_stage={state.last_stage}")
+    print(f"total    | {total * 1000:9.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("turns", help="JSON file with a list of user messages")
+    args = parser.parse_args()
+    with open(args.turns, encoding="utf-8") as f:
+        turns = json.load(f)
+    asyncio.run(run(turns))
+
+
+if __name__ == "__main__":
+    main()
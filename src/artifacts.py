@@ -0,0 +1,206 @@
+"""Per-session, content-addressed store for generated files (PPT decks).
+
+- 每個 session 有自己的目錄：<artifact_dir>/<session_id>/<digest><suffix>
+- digest 由產生檔案的內容來源計算，同一份內容只產生一次 (重複呼叫直接回傳既有檔案)
+- 先寫暫存檔再 os.replace，讀取端不會看到寫到一半的檔案
+- 總大小超過上限或閒置超過期限時，依最後存取時間 (LRU) 清除
+- UI 以 (session_id, artifact_id) 取回檔案，不再依賴模型給的檔名或目前工作目錄
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Callable, Dict, Optional, Tuple
+
+from src.config import config
+from src.logger import logger
+
+_SAFE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+DIGEST_LENGTH = 32
+
+
+def digest(*parts: str) -> str:
+    """內容來源的雜湊，作為 artifact id"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:DIGEST_LENGTH]
+
+
+@dataclass
+class Artifact:
+    id: str
+    session_id: str
+    path: str
+    size: int
+    last_access: float
+
+
+@dataclass
+class ArtifactStoreStats:
+    artifacts: int
+    total_bytes: int
+    writes: int
+    dedup_hits: int
+    collected: int
+
+
+class ArtifactStore:
+    def __init__(self, root: str, quota_bytes: int, max_age_seconds: float):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self._artifacts: Dict[Tuple[str, str], Artifact] = {}
+        self._total_bytes = 0
+        self._writes = 0
+        self._dedup_hits = 0
+        self._collected = 0
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self) -> None:
+        """啟動時載入既有檔案，並清掉中斷寫入留下的暫存檔"""
+        if not os.path.isdir(self.root):
+            return
+        for session_id in os.listdir(self.root):
+            session_dir = os.path.join(self.root, session_id)
+            if not os.path.isdir(session_dir):
+                continue
+            for name in os.listdir(session_dir):
+                path = os.path.join(session_dir, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                artifact_id = name.split(".", 1)[0]
+                self._artifacts[(session_id, artifact_id)] = Artifact(
+                    artifact_id, session_id, path, stat.st_size, stat.st_mtime
+                )
+                self._total_bytes += stat.st_size
+        with self._lock:
+            self._collect()
+
+    def put(
+        self,
+        session_id: str,
+        artifact_id: str,
+        write: Callable[[IO[bytes]], None],
+        suffix: str = "",
+    ) -> Artifact:
+        """以 write(file) 產生檔案；相同 artifact_id 已存在時不重新產生"""
+        _check_id(session_id)
+        _check_id(artifact_id)
+        key = (session_id, artifact_id)
+        with self._lock:
+            existing = self._artifacts.get(key)
+            if existing is not None and os.path.exists(existing.path):
+                existing.last_access = time.time()
+                self._dedup_hits += 1
+                return existing
+
+        session_dir = os.path.join(self.root, session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        path = os.path.join(session_dir, f"{artifact_id}{suffix}")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        artifact = Artifact(
+            artifact_id, session_id, path, os.path.getsize(path), time.time()
+        )
+        with self._lock:
+            previous = self._artifacts.get(key)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            self._artifacts[key] = artifact
+            self._total_bytes += artifact.size
+            self._writes += 1
+            self._collect(keep=key)
+        return artifact
+
+    def read(self, session_id: str, artifact_id: str) -> Optional[bytes]:
+        """取回檔案內容；不存在或已被清除時回傳 None"""
+        with self._lock:
+            artifact = self._artifacts.get((session_id, artifact_id))
+            if artifact is None:
+                return None
+            artifact.last_access = time.time()
+        try:
+            with open(artifact.path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def path(self, session_id: str, artifact_id: str) -> Optional[str]:
+        """檔案在磁碟上的路徑；不存在時回傳 None"""
+        with self._lock:
+            artifact = self._artifacts.get((session_id, artifact_id))
+        return artifact.path if artifact is not None else None
+
+    def _collect(self, keep: Optional[Tuple[str, str]] = None) -> None:
+        """移除過期的檔案，再依 LRU 移除直到總大小低於上限"""
+        now = time.time()
+        for key, artifact in sorted(
+            self._artifacts.items(), key=lambda item: item[1].last_access
+        ):
+            if key == keep:
+                continue
+            expired = now - artifact.last_access > self.max_age_seconds
+            if not expired and self._total_bytes <= self.quota_bytes:
+                break
+            self._remove(key)
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        artifact = self._artifacts.pop(key)
+        self._total_bytes -= artifact.size
+        self._collected += 1
+        try:
+            os.remove(artifact.path)
+            os.rmdir(os.path.dirname(artifact.path))
+        except OSError:
+            # 目錄內還有其他檔案
+            pass
+        logger.info(
+            f"Artifact {artifact.id} of session {artifact.session_id[:8]} collected, "
+            f"{self.stats()}"
+        )
+
+    def stats(self) -> ArtifactStoreStats:
+        return ArtifactStoreStats(
+            artifacts=len(self._artifacts),
+            total_bytes=self._total_bytes,
+            writes=self._writes,
+            dedup_hits=self._dedup_hits,
+            collected=self._collected,
+        )
+
+
+def _check_id(value: str) -> None:
+    if not _SAFE_ID_RE.match(value or ""):
+        raise ValueError(f"Invalid artifact path component: {value!r}")
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """整個 process 共用一個 store"""
+    global _artifact_store
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore(
+                config.artifact_dir,
+                quota_bytes=config.artifact_quota_bytes,
+                max_age_seconds=config.artifact_max_age_seconds,
+            )
+    return _artifact_store
@@ -0,0 +1,106 @@
+"""Bulk PPT export of stored strategy sessions, without any LLM call.
+
+讀取已完成 session 的 final_summary / hmw_output，以 process pool 平行轉成 PPTX。
+
+Usage:
+    uv run python -m src.bulk_export data/sessions.jsonl --out decks [--template t.pptx]
+"""
+
+import argparse
+import copy
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from pptx import Presentation
+from pptx.presentation import Presentation as PresentationDocument
+
+from src.slides import report_to_slides
+from src.tool import build_presentation
+
+# 每個 worker 只解析一次樣板，每份簡報從解析好的樣板深拷貝 (比重新解析 XML 快)
+_template: Optional[PresentationDocument] = None
+
+
+def _init_worker(template_path: Optional[str]) -> None:
+    global _template
+    if template_path:
+        with open(template_path, "rb") as f:
+            _template = Presentation(io.BytesIO(f.read()))
+
+
+def _render_deck(job: Tuple[dict, str]) -> Tuple[str, Optional[str]]:
+    """在 worker 中產生一份簡報，回傳 (輸出路徑, 錯誤訊息)"""
+    record, out_path = job
+    # 先寫暫存檔再替換，避免留下寫到一半的檔案
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    try:
+        slides = report_to_slides(record["final_summary"], record.get("hmw_output"))
+        template = copy.deepcopy(_template) if _template is not None else None
+        prs = build_presentation(slides, template)
+        prs.save(tmp_path)
+        os.replace(tmp_path, out_path)
+        return out_path, None
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return out_path, str(e)
+
+
+def iter_jobs(input_path: str, out_dir: str) -> Iterator[Tuple[dict, str]]:
+    """從 JSONL 讀取有 final_summary 的紀錄"""
+    with open(input_path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("final_summary"):
+                continue
+            name = record.get("session_id") or f"session_{i:06d}"
+            yield record, os.path.join(out_dir, f"{name}.pptx")
+
+
+def export_all(
+    input_path: str,
+    out_dir: str,
+    template_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+) -> Tuple[int, int, float]:
+    """平行匯出所有簡報，回傳 (成功數, 失敗數, 秒數)"""
+    os.makedirs(out_dir, exist_ok=True)
+    done = failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(template_path,)
+    ) as executor:
+        jobs = iter_jobs(input_path, out_dir)
+        for out_path, error in executor.map(_render_deck, jobs, chunksize=chunksize):
+            if error:
+                failed += 1
+                print(f"failed: {out_path}: {error}")
+            else:
+                done += 1
+    return done, failed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", help="JSONL file of stored sessions")
+    parser.add_argument("--out", default="decks", help="output directory")
+    parser.add_argument("--template", default=None, help="PPTX template file")
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    args = parser.parse_args()
+
+    done, failed, elapsed = export_all(
+        args.input, args.out, args.template, args.workers
+    )
+    rate = done / elapsed if elapsed else 0.0
+    print(f"exported {done} decks ({failed} failed) in {elapsed:.1f}s, {rate:.1f} decks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Record/replay transport for LLM HTTP calls.
+
+record 模式會把每次 LLM 請求與回應 (包含 structured output 與 tool calls) 寫入 cassette，
+replay 模式則依正規化後的請求雜湊離線回放，可依原始或縮放後的延遲回應，
+讓整段對話不需呼叫 API 也能重現，方便做效能比較與回歸測試。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.logger import logger
+
+# 每次呼叫都會變動、不影響回應內容的欄位
+VOLATILE_KEYS = {"id", "tool_call_id", "user"}
+
+
+class CassetteMissError(RuntimeError):
+    """replay 模式下找不到對應的錄製紀錄"""
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: _normalize(v) for k, v in sorted(value.items()) if k not in VOLATILE_KEYS
+        }
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def request_key(request: httpx.Request) -> str:
+    """以 method、路徑與正規化後的 JSON payload 計算請求雜湊"""
+    body = request.content or b""
+    try:
+        payload = _normalize(json.loads(body))
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    except (ValueError, UnicodeDecodeError):
+        pass
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """JSONL cassette：每行一筆 {key, status, content_type, body, latency}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            self._entries[entry["key"]].append(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+
+    def next(self, key: str) -> Optional[dict]:
+        """依錄製順序取出紀錄；同一請求重複出現時，最後一筆會被重複使用"""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            if len(entries) > 1:
+                return entries.popleft()
+            return entries[0]
+
+
+def _recorded_entry(
+    key: str, response: httpx.Response, body: bytes, latency: float
+) -> dict:
+    return {
+        "key": key,
+        "status": response.status_code,
+        "content_type": response.headers.get("content-type", "application/json"),
+        "body": body.decode("utf-8"),
+        "latency": round(latency, 4),
+    }
+
+
+def _to_response(entry: dict, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        status_code=entry["status"],
+        headers={"content-type": entry.get("content_type", "application/json")},
+        content=entry["body"].encode("utf-8"),
+        request=request,
+    )
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """httpx 非同步 transport，依模式錄製或回放請求"""
+
+    def __init__(self, cassette: Cassette, mode: str, latency_scale: float = 0.0):
+        self.cassette = cassette
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._transport = httpx.AsyncHTTPTransport() if mode == "record" else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        if self.mode == "replay":
+            entry = self.cassette.next(key)
+            if entry is None:
+                raise CassetteMissError(f"No recorded response for request {key[:12]}")
+            if self.latency_scale > 0:
+                await asyncio.sleep(entry["latency"] * self.latency_scale)
+            return _to_response(entry, request)
+
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        body = await response.aread()
+        latency = time.perf_counter() - start
+        entry = _recorded_entry(key, response, body, latency)
+        self.cassette.append(entry)
+        logger.info(f"Cassette recorded {key[:12]} ({latency:.2f}s)")
+        return _to_response(entry, request)
+
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self._transport.aclose()
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """httpx 同步 transport，行為與 AsyncCassetteTransport 相同"""
+
+    def __init__(self, cassette: Cassette, mode: str, latency_scale: float = 0.0):
+        self.cassette = cassette
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._transport = httpx.HTTPTransport() if mode == "record" else None
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        if self.mode == "replay":
+            entry = self.cassette.next(key)
+            if entry is None:
+                raise CassetteMissError(f"No recorded response for request {key[:12]}")
+            if self.latency_scale > 0:
+                time.sleep(entry["latency"] * self.latency_scale)
+            return _to_response(entry, request)
+
+        start = time.perf_counter()
+        response = self._transport.handle_request(request)
+        body = response.read()
+        entry = _recorded_entry(key, response, body, time.perf_counter() - start)
+        self.cassette.append(entry)
+        return _to_response(entry, request)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def get_cassette(path: str) -> Cassette:
+    """同一路徑共用一個 cassette，讓所有模型實例寫入同一份紀錄"""
+    if path not in _cassettes:
+        _cassettes[path] = Cassette(path)
+    return _cassettes[path]
+
+
+def cassette_clients(
+    mode: str, path: str, latency_scale: float = 0.0
+) -> Dict[str, Any]:
+    """回傳要傳給 ChatOpenAI 的 http client 參數；mode 為 off 時回傳空 dict"""
+    if mode not in ("record", "replay"):
+        return {}
+    cassette = get_cassette(path)
+    logger.info(f"LLM cassette {mode}: {path} ({len(cassette)} entries)")
+    clients: Dict[str, Any] = {
+        "http_client": httpx.Client(
+            transport=CassetteTransport(cassette, mode, latency_scale)
+        ),
+        "http_async_client": httpx.AsyncClient(
+            transport=AsyncCassetteTransport(cassette, mode, latency_scale)
+        ),
+    }
+    if mode == "replay":
+        # 找不到紀錄時不需要重試
+        clients["max_retries"] = 0
+    return clients
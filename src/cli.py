@@ -0,0 +1,200 @@
+"""Headless terminal REPL that drives the compiled graph without Streamlit.
+
+- 每行輸入是一輪對話，節點的輸出一完成就印到 stdout (報告章節逐段輸出)
+- session 狀態在每輪結束後寫到本地 JSON 檔，下次以同一個檔案啟動可接續對話
+- stdin 不是終端機時 (例如以管線送入事先寫好的回答) 不顯示提示字元，讀到 EOF 即結束
+- graph 與 LLM 套件在背景執行緒匯入，提示字元不必等待匯入完成
+
+Usage:
+    uv run python -m src.cli                                 # 互動模式
+    uv run python -m src.cli --session data/cli/demo.json    # 接續既有 session
+    cat answers.txt | uv run python -m src.cli --session data/cli/smoke.json
+
+REPL 指令：/reset 清除 session，/quit 離開。
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+# 每輪由 app 或呼叫端決定的旗標，不寫進 session 檔
+PER_TURN_FIELDS = ("degraded", "what_if_requested", "intake_form", "escalated_loop")
+
+
+class _BackgroundImport(threading.Thread):
+    """在背景匯入較重的模組，第一次需要時才等待"""
+
+    def __init__(self, *names: str):
+        super().__init__(daemon=True, name="cli-import")
+        self.names = names
+        self.modules: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+        self.start()
+
+    def run(self) -> None:
+        try:
+            for name in self.names:
+                self.modules[name] = importlib.import_module(name)
+        except BaseException as e:
+            self.error = e
+
+    def get(self, name: str) -> Any:
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.modules[name]
+
+
+def load_session(path: str) -> Dict[str, Any]:
+    """讀取 session 檔；不存在時建立新的 session"""
+    if not os.path.exists(path):
+        return {"session_id": uuid.uuid4().hex, "state": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_session(path: str, session: Dict[str, Any]) -> None:
+    """先寫暫存檔再替換，中斷時不會留下寫到一半的 session 檔"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(session, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def _print_message(message: Any, session_id: str) -> None:
+    from langchain_core.messages import AIMessage, ToolMessage
+
+    from src.artifacts import get_artifact_store
+
+    if isinstance(message, ToolMessage):
+        artifact = getattr(message, "artifact", None)
+        if isinstance(artifact, dict) and artifact.get("artifact_id"):
+            path = get_artifact_store().path(session_id, artifact["artifact_id"])
+            print(f"📎 {artifact['filename']} → {path}", flush=True)
+        else:
+            print(f"🔧 {message.content}", flush=True)
+    elif isinstance(message, AIMessage) and message.content:
+        print(f"\n🤖 {message.content}\n", flush=True)
+        for branch in message.additional_kwargs.get("what_if_branches", []):
+            print(f"### 🪜 {branch['question']}\n{branch['draft']}\n", flush=True)
+
+
+async def run_turn(graph: Any, state: Any, session_id: str) -> Dict[str, Any]:
+    """執行一輪並即時輸出各節點的結果，回傳最終狀態"""
+    from src.snapshots import snapshots_for_turn
+
+    result = None
+    streamed = False
+    snapshots = snapshots_for_turn(session_id)
+    async for mode, chunk in graph.astream(
+        state,
+        stream_mode=["custom", "updates", "values"],
+        config={
+            "callbacks": [snapshots] if snapshots is not None else [],
+            "configurable": {"session_id": session_id},
+        },
+    ):
+        if mode == "values":
+            result = chunk
+        elif mode == "custom" and "final_summary_section" in chunk:
+            print(f"\n{chunk['content']}", flush=True)
+            streamed = True
+        elif mode == "updates":
+            for node, update in chunk.items():
+                print(f"· {node}", file=sys.stderr, flush=True)
+                # 已逐段輸出的報告不再整份重印
+                if streamed and node in ("final_summary", "what_if"):
+                    streamed = False
+                    continue
+                for message in (update or {}).get("messages", []):
+                    _print_message(message, session_id)
+    if snapshots is not None:
+        # 快照在背景寫入；CLI 可能隨即結束，先等它寫完
+        await asyncio.to_thread(snapshots.store.flush)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--session",
+        default="data/cli_session.json",
+        help="session file to resume and update (default: data/cli_session.json)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="show INFO logs")
+    args = parser.parse_args()
+
+    # 在讀取輸入的同時匯入 graph 與相依套件
+    imports = _BackgroundImport("src.graph", "src.state", "langchain_core.messages")
+    from src.logger import console_handler
+
+    console_handler.setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    # 同一個事件迴圈跑完整個 session，模型的 HTTP 連線可跨輪重複使用
+    loop = asyncio.new_event_loop()
+    interactive = sys.stdin.isatty()
+    session = load_session(args.session)
+    if interactive:
+        turns = sum(
+            1 for m in session["state"].get("messages", []) if m.get("type") == "human"
+        )
+        print(f"session {session['session_id'][:8]} ({turns} turns) — /quit 離開")
+
+    while True:
+        try:
+            line = input("👤 " if interactive else "")
+        except EOFError:
+            break
+        user_message = line.strip()
+        if not user_message:
+            continue
+        if user_message == "/quit":
+            break
+        if user_message == "/reset":
+            session = {"session_id": uuid.uuid4().hex, "state": {}}
+            save_session(args.session, session)
+            print("session reset")
+            continue
+        if not interactive:
+            print(f"👤 {user_message}", flush=True)
+
+        graph = imports.get("src.graph").graph
+        State = imports.get("src.state").State
+        messages = imports.get("langchain_core.messages")
+
+        data = dict(session["state"])
+        history = messages.messages_from_dict(data.pop("messages", []))
+        state = State(
+            **data, messages=history + [messages.HumanMessage(content=user_message)]
+        )
+
+        start = time.perf_counter()
+        result = loop.run_until_complete(
+            run_turn(graph, state, session["session_id"])
+        )
+        elapsed = time.perf_counter() - start
+        print(
+            f"[{result.get('last_stage')} | {elapsed:.1f}s]",
+            file=sys.stderr,
+            flush=True,
+        )
+
+        state_data = {k: v for k, v in result.items() if k not in PER_TURN_FIELDS}
+        state_data["messages"] = messages.messages_to_dict(result["messages"])
+        session["state"] = state_data
+        save_session(args.session, session)
+
+
+if __name__ == "__main__":
+    main()
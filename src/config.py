@@ -16,9 +16,120 @@ class LLMConfig:
     temperature: float = float(os.getenv("LLM_TEMPERATURE", "1.0"))
     openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
 
+    # Record/replay settings: "off", "record" 或 "replay"
+    cassette_mode: str = os.getenv("LLM_CASSETTE_MODE", "off")
+    cassette_path: str = os.getenv("LLM_CASSETTE_PATH", "cassettes/default.jsonl")
+    cassette_latency_scale: float = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "0.0"))
+
     # Specialized settings
     creative_temperature: float = float(os.getenv("LLM_CREATIVE_TEMPERATURE", "1.0"))
     strict_temperature: float = float(os.getenv("LLM_STRICT_TEMPERATURE", "0.0"))
 
+    # Cross-silo settings: "single" (一次生成) 或 "map_reduce" (各部門平行生成)
+    cross_silo_mode: str = os.getenv("CROSS_SILO_MODE", "single")
+    cross_silo_max_departments: int = int(os.getenv("CROSS_SILO_MAX_DEPARTMENTS", "4"))
+    # 含 structured output 的 JSON 欄位名稱與引號；中文三項資源加例子約 300 tokens
+    cross_silo_department_max_tokens: int = int(
+        os.getenv("CROSS_SILO_DEPARTMENT_MAX_TOKENS", "500")
+    )
+
+    # Final summary settings: "single" (一次生成) 或 "parallel" (各章節平行生成)
+    final_summary_mode: str = os.getenv("FINAL_SUMMARY_MODE", "single")
+    final_summary_cache_size: int = int(os.getenv("FINAL_SUMMARY_CACHE_SIZE", "256"))
+
+    # Evaluation settings: "single" (一次輸出完整評估) 或 "parallel" (各維度平行評分)
+    evaluation_mode: str = os.getenv("EVALUATION_MODE", "single")
+    evaluation_dimension_max_tokens: int = int(
+        os.getenv("EVALUATION_DIMENSION_MAX_TOKENS", "120")
+    )
+
+    # File export settings: "llm" (由模型拆解投影片) 或 "deterministic" (直接解析報告)
+    file_export_mode: str = os.getenv("FILE_EXPORT_MODE", "llm")
+
+    # Similar-session retrieval settings
+    session_index_enabled: bool = (
+        os.getenv("SESSION_INDEX_ENABLED", "false").lower() == "true"
+    )
+    session_store_path: str = os.getenv("SESSION_STORE_PATH", "data/sessions.jsonl")
+    session_index_top_k: int = int(os.getenv("SESSION_INDEX_TOP_K", "2"))
+    session_index_min_score: float = float(os.getenv("SESSION_INDEX_MIN_SCORE", "0.35"))
+
+    # Department-resource knowledge settings (跨部門資源目錄)
+    knowledge_enabled: bool = os.getenv("KNOWLEDGE_ENABLED", "false").lower() == "true"
+    knowledge_db_path: str = os.getenv(
+        "KNOWLEDGE_DB_PATH", "data/department_knowledge.sqlite"
+    )
+    knowledge_top_k: int = int(os.getenv("KNOWLEDGE_TOP_K", "4"))
+
+    # Overload (load-shedding) settings
+    overload_enabled: bool = os.getenv("OVERLOAD_ENABLED", "false").lower() == "true"
+    overload_in_flight_high: int = int(os.getenv("OVERLOAD_IN_FLIGHT_HIGH", "32"))
+    overload_in_flight_low: int = int(os.getenv("OVERLOAD_IN_FLIGHT_LOW", "16"))
+    overload_p95_high: float = float(os.getenv("OVERLOAD_P95_HIGH", "20.0"))
+    overload_p95_low: float = float(os.getenv("OVERLOAD_P95_LOW", "10.0"))
+    degraded_model_name: str = os.getenv("LLM_DEGRADED_MODEL_NAME", "gpt-4.1-nano")
+    degraded_max_tokens: int = int(os.getenv("LLM_DEGRADED_MAX_TOKENS", "600"))
+
+    # Per-turn profiling settings
+    profile_turns: bool = os.getenv("PROFILE_TURNS", "false").lower() == "true"
+    profile_dir: str = os.getenv("PROFILE_DIR", "profiles")
+    profile_interval: float = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+    # Span tracing settings
+    trace_enabled: bool = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+    trace_dir: str = os.getenv("TRACE_DIR", "traces")
+
+    # Per-node snapshot settings (python -m src.replay 重跑節點)
+    snapshot_enabled: bool = os.getenv("SNAPSHOT_ENABLED", "false").lower() == "true"
+    snapshot_db_path: str = os.getenv("SNAPSHOT_DB_PATH", "data/snapshots.sqlite")
+
+    # Conversation store settings (記憶體上限與閒置移出)
+    session_memory_max_bytes: int = int(
+        os.getenv("SESSION_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    session_spill_dir: str = os.getenv("SESSION_SPILL_DIR", "data/spilled_sessions")
+    session_max_idle_seconds: float = float(
+        os.getenv("SESSION_MAX_IDLE_SECONDS", "1800")
+    )
+    # 移到磁碟的 session 超過此時間未再存取就刪除 (瀏覽器 session 早已結束)
+    session_spill_ttl_seconds: float = float(
+        os.getenv("SESSION_SPILL_TTL_SECONDS", str(7 * 24 * 3600))
+    )
+
+    # Intake settings: "chat" (對話萃取) 或 "form" (結構化表單)
+    intake_mode: str = os.getenv("INTAKE_MODE", "chat")
+
+    # Loop governor settings (追問迴圈上限與重複追問判定)
+    refine_max_loops: int = int(os.getenv("REFINE_MAX_LOOPS", "4"))
+    cross_silo_max_loops: int = int(os.getenv("CROSS_SILO_MAX_LOOPS", "4"))
+    loop_duplicate_threshold: float = float(
+        os.getenv("LOOP_DUPLICATE_THRESHOLD", "0.6")
+    )
+
+    # Local intent classifier settings (簡短確認回覆不呼叫 LLM)
+    intent_classifier_enabled: bool = (
+        os.getenv("INTENT_CLASSIFIER_ENABLED", "false").lower() == "true"
+    )
+    intent_confidence_threshold: float = float(
+        os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8")
+    )
+
+    # Document ingestion settings (上傳文件萃取問題輪廓)
+    ingest_chunk_chars: int = int(os.getenv("INGEST_CHUNK_CHARS", "2000"))
+    ingest_max_chunks: int = int(os.getenv("INGEST_MAX_CHUNKS", "50"))
+    ingest_max_concurrency: int = int(os.getenv("INGEST_MAX_CONCURRENCY", "4"))
+
+    # What-if branch settings (梯級分析問題平行草稿)
+    what_if_max_branches: int = int(os.getenv("WHAT_IF_MAX_BRANCHES", "3"))
+
+    # Artifact store settings (產生的簡報檔)
+    artifact_dir: str = os.getenv("ARTIFACT_DIR", "data/artifacts")
+    artifact_quota_bytes: int = int(
+        os.getenv("ARTIFACT_QUOTA_BYTES", str(512 * 1024 * 1024))
+    )
+    artifact_max_age_seconds: float = float(
+        os.getenv("ARTIFACT_MAX_AGE_SECONDS", str(7 * 24 * 3600))
+    )
+
 
 config = LLMConfig()
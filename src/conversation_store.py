@@ -0,0 +1,226 @@
+"""Memory-bounded store for per-session conversation state.
+
+對話狀態 (訊息歷史、問題輪廓、評估結果、跨部門討論、最終報告) 不再常駐在
+Streamlit session_state，而是放在這個 store：
+- 常駐記憶體的總大小有上限，超過時依 LRU 把閒置 session 序列化 (JSON + zlib) 寫到磁碟
+- 閒置超過一定時間的 session 也會被移出記憶體
+- 下次存取時自動從磁碟還原，還原或重新寫回後即刪除磁碟上的檔案
+- 啟動時重新掃描磁碟上的 session；超過保存期限仍未存取的直接刪除
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from src.config import config
+from src.logger import logger
+
+
+def _encode(data: Dict[str, Any]) -> bytes:
+    payload = {**data, "messages": messages_to_dict(data.get("messages", []))}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _decode(raw: bytes) -> Dict[str, Any]:
+    data = json.loads(raw)
+    data["messages"] = messages_from_dict(data.get("messages", []))
+    return data
+
+
+@dataclass
+class _Entry:
+    data: Dict[str, Any]
+    size: int
+    last_access: float
+
+
+@dataclass
+class ConversationStoreStats:
+    resident: int
+    spilled: int
+    resident_bytes: int
+    evictions: int
+    rehydrations: int
+    expired: int
+    last_rehydrate_ms: float
+    avg_rehydrate_ms: float
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        factory: Callable[[], Dict[str, Any]],
+        max_bytes: int,
+        spill_dir: str,
+        max_idle_seconds: float,
+        spill_ttl_seconds: float,
+    ):
+        self.factory = factory
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_idle_seconds = max_idle_seconds
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self._resident: "OrderedDict[str, _Entry]" = OrderedDict()
+        # session_id -> 寫到磁碟的時間 (wall clock)，舊的在前
+        self._spilled: "OrderedDict[str, float]" = OrderedDict()
+        self._resident_bytes = 0
+        self._evictions = 0
+        self._rehydrations = 0
+        self._rehydrate_total = 0.0
+        self._last_rehydrate = 0.0
+        self._expired = 0
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self) -> None:
+        """載入上次執行留在磁碟的 session，順便清掉寫到一半的暫存檔"""
+        if not os.path.isdir(self.spill_dir):
+            return
+        spilled = []
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            if name.endswith(".session"):
+                spilled.append((os.path.getmtime(path), name[: -len(".session")]))
+            elif name.endswith(".session.tmp"):
+                os.remove(path)
+        for spilled_at, session_id in sorted(spilled):
+            self._spilled[session_id] = spilled_at
+        self._expire()
+        if self._spilled:
+            logger.info(f"Found {len(self._spilled)} spilled sessions on disk")
+
+    def _expire(self) -> None:
+        """刪除超過保存期限的 session 檔案"""
+        cutoff = time.time() - self.spill_ttl_seconds
+        while self._spilled:
+            session_id, spilled_at = next(iter(self._spilled.items()))
+            if spilled_at > cutoff:
+                break
+            self._discard_spilled(session_id)
+            self._expired += 1
+
+    def _discard_spilled(self, session_id: str) -> None:
+        if self._spilled.pop(session_id, None) is not None:
+            try:
+                os.remove(self._spill_path(session_id))
+            except FileNotFoundError:
+                pass
+
+    def _spill_path(self, session_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{session_id}.session")
+
+    def get(self, session_id: str) -> Dict[str, Any]:
+        """取得 session 狀態；已移到磁碟的會自動還原"""
+        with self._lock:
+            entry = self._resident.get(session_id)
+            if entry is None:
+                entry = self._load(session_id)
+            entry.last_access = time.monotonic()
+            self._resident.move_to_end(session_id)
+            self._evict(keep=session_id)
+            return entry.data
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        """寫回 session 狀態並依上限移出其他 session"""
+        size = len(_encode(data))
+        with self._lock:
+            previous = self._resident.pop(session_id, None)
+            if previous is not None:
+                self._resident_bytes -= previous.size
+            self._discard_spilled(session_id)
+            self._resident[session_id] = _Entry(data, size, time.monotonic())
+            self._resident_bytes += size
+            self._evict(keep=session_id)
+
+    def _load(self, session_id: str) -> _Entry:
+        if session_id in self._spilled:
+            start = time.perf_counter()
+            path = self._spill_path(session_id)
+            with open(path, "rb") as f:
+                raw = zlib.decompress(f.read())
+            data = _decode(raw)
+            self._discard_spilled(session_id)
+            elapsed = (time.perf_counter() - start) * 1000
+            self._rehydrations += 1
+            self._rehydrate_total += elapsed
+            self._last_rehydrate = elapsed
+            logger.info(
+                f"Session {session_id[:8]} rehydrated in {elapsed:.1f}ms, "
+                f"{self.stats()}"
+            )
+            size = len(raw)
+        else:
+            data = self.factory()
+            size = len(_encode(data))
+        entry = _Entry(data, size, time.monotonic())
+        self._resident[session_id] = entry
+        self._resident_bytes += size
+        return entry
+
+    def _evict(self, keep: str) -> None:
+        """移出閒置過久或超出大小上限的 session (LRU 優先)"""
+        self._expire()
+        now = time.monotonic()
+        for session_id in list(self._resident):
+            if session_id == keep:
+                continue
+            entry = self._resident[session_id]
+            idle = now - entry.last_access > self.max_idle_seconds
+            if not idle and self._resident_bytes <= self.max_bytes:
+                break
+            self._spill(session_id)
+
+    def _spill(self, session_id: str) -> None:
+        entry = self._resident.pop(session_id)
+        self._resident_bytes -= entry.size
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = self._spill_path(session_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(_encode(entry.data)))
+        os.replace(tmp_path, path)
+        self._spilled[session_id] = time.time()
+        self._evictions += 1
+        logger.info(f"Session {session_id[:8]} spilled to disk, {self.stats()}")
+
+    def stats(self) -> ConversationStoreStats:
+        return ConversationStoreStats(
+            resident=len(self._resident),
+            spilled=len(self._spilled),
+            resident_bytes=self._resident_bytes,
+            evictions=self._evictions,
+            rehydrations=self._rehydrations,
+            expired=self._expired,
+            last_rehydrate_ms=round(self._last_rehydrate, 2),
+            avg_rehydrate_ms=round(
+                self._rehydrate_total / max(self._rehydrations, 1), 2
+            ),
+        )
+
+
+_conversation_store: Optional[ConversationStore] = None
+_conversation_store_lock = threading.Lock()
+
+
+def get_conversation_store(
+    factory: Callable[[], Dict[str, Any]]
+) -> ConversationStore:
+    """整個 process 共用一個 store"""
+    global _conversation_store
+    with _conversation_store_lock:
+        if _conversation_store is None:
+            _conversation_store = ConversationStore(
+                factory,
+                max_bytes=config.session_memory_max_bytes,
+                spill_dir=config.session_spill_dir,
+                max_idle_seconds=config.session_max_idle_seconds,
+                spill_ttl_seconds=config.session_spill_ttl_seconds,
+            )
+    return _conversation_store
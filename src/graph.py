@@ -1,33 +1,55 @@
 """LangGraph for Streamlit UI (without interrupt nodes)."""
 
+from typing import Optional
+
 from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 
+from src.config import config
 from src.llm import tools
 from src.logger import logger
+from src.loop_governor import CROSS_SILO_LOOP, REFINE_LOOP, loop_governor
+from src.profile_tracking import changed_fields, evaluation_skips
 from src.nodes import (
     node_cross_silo_ask,
+    node_cross_silo_ask_parallel,
     node_cross_silo_evaluate,
     node_evaluation,
-    node_file_export,
+    node_evaluation_parallel,
+    node_file_export_adaptive,
+    node_file_export_deterministic,
     node_final_summary,
+    node_final_summary_parallel,
     node_hmw_gen,
     node_refine_ask,
+    node_refine_escalate,
     node_reflection,
     node_situation,
     node_summary,
+    node_what_if,
 )
-from src.state import State
+from src.state import PASSING_SCORE, State
+
+
+def profile_unchanged(state: State) -> bool:
+    """problem_profile 是否與上次評估時相同."""
+    unchanged = bool(state.evaluated_profile_hashes) and not changed_fields(
+        state.problem_profile, state.evaluated_profile_hashes
+    )
+    evaluation_skips.record(unchanged)
+    return unchanged
 
 
 def route_after_situation(state: State) -> str:
     """Route based on whether information is complete."""
     # 如果上一輪是 refine_ask，直接進入 summary, evaluation 重新評估
-    if state.last_stage == "refine_ask":
-        return "summary"
-
-    if state.reflection_result["is_complete"]:
-        return "summary"  # 資訊齊全，進入下一關
+    # 降載模式略過 summary，直接評估
+    next_stage = "evaluation" if state.degraded else "summary"
+    if state.last_stage == "refine_ask" or state.reflection_result["is_complete"]:
+        # profile 沒有變動時略過 summary, evaluation，沿用上次的評估結果
+        if profile_unchanged(state):
+            return route_after_evaluation(state)
+        return next_stage  # 資訊齊全，進入下一關
     else:
         return "reflection"  # 資訊不齊全，進入追問
 
@@ -36,15 +58,24 @@ def route_after_evaluation(state: State) -> str:
     """Route based on whether evaluation suggests refinement."""
     if state.is_passing_evaluation:
         return "hmw_gen"  # 資訊齊全，進入下一關
+    elif loop_governor.exhausted(REFINE_LOOP, state.loop_counts):
+        return "refine_escalate"  # 追問次數已達上限，以最佳 profile 繼續
     else:
         return "refine_ask"  # 資訊不齊全，進入追問
 
 
+def route_after_refine_ask(state: State) -> str:
+    """Route to escalation when the follow-up question repeats itself."""
+    if state.escalated_loop == REFINE_LOOP:
+        return "refine_escalate"
+    return END
+
+
 def route_after_cross_silo(state: State) -> str:
     """Route based on whether cross-silo information is complete."""
     score = state.cross_silo_evaluation.get("score", 0)
-    if score < 65:
-        return END  # 分數低於 65，中斷等待用戶回答（繼續對話）
+    if score < PASSING_SCORE and state.escalated_loop != CROSS_SILO_LOOP:
+        return END  # 分數未及格，中斷等待用戶回答（繼續對話）
     else:
         return "final_summary"  # 分數達標，進入總結
 
@@ -52,6 +83,10 @@ def route_after_cross_silo(state: State) -> str:
 def route_start(state: State) -> str:
     """Determine where to start based on state."""
     logger.info({"route_start": state.last_stage})
+    if state.intake_form:
+        return "evaluation"  # 表單已填好 profile，略過 situation 萃取
+    if state.what_if_requested and state.final_summary:
+        return "what_if"
     if state.last_stage == "file_export":
         return "file_export"
 
@@ -59,77 +94,126 @@ def route_start(state: State) -> str:
     score = state.cross_silo_evaluation.get("score", 0)
 
     # 進入 evaluate 的條件：已經有 result (代表 ask 過了) 且 用戶剛回答完 (last_stage 可能是 ask 或 evaluate loop)
-    # 如果 score >= 65 會在 route_after_cross_silo 就走 final_summary，所以這裡處理的是未完成的 loop
-    if result and score < 65:
+    # 如果 score 及格會在 route_after_cross_silo 就走 final_summary，所以這裡處理的是未完成的 loop
+    if result and score < PASSING_SCORE:
         return "cross_silo_evaluate"
 
     return "situation"
 
 
-# Create workflow for Streamlit (skip greeting node with interrupt)
-workflow_streamlit = StateGraph(State)
-
-# Add nodes (no greeting node for Streamlit)
-workflow_streamlit.add_node("situation", node_situation)
-workflow_streamlit.add_node("reflection", node_reflection)
-workflow_streamlit.add_node("summary", node_summary)
-workflow_streamlit.add_node("evaluation", node_evaluation)
-workflow_streamlit.add_node("refine_ask", node_refine_ask)
-workflow_streamlit.add_node("hmw_gen", node_hmw_gen)
-workflow_streamlit.add_node("cross_silo_ask", node_cross_silo_ask)
-workflow_streamlit.add_node("cross_silo_evaluate", node_cross_silo_evaluate)
-workflow_streamlit.add_node("final_summary", node_final_summary)
-workflow_streamlit.add_node("file_export", node_file_export)
-workflow_streamlit.add_node("tools", ToolNode(tools))
-# Define entry point routing
-workflow_streamlit.add_conditional_edges(
-    START,
-    route_start,
-    {
-        "situation": "situation",
-        "cross_silo_evaluate": "cross_silo_evaluate",
-        "file_export": "file_export",
-    },
-)
-
-workflow_streamlit.add_edge("reflection", END)
-workflow_streamlit.add_edge("summary", "evaluation")
-workflow_streamlit.add_edge("refine_ask", END)
-workflow_streamlit.add_edge("hmw_gen", "cross_silo_ask")
-workflow_streamlit.add_edge("cross_silo_ask", END)
-workflow_streamlit.add_edge("final_summary", "file_export")
-workflow_streamlit.add_edge("tools", END)
-
-workflow_streamlit.add_conditional_edges(
-    "situation",
-    route_after_situation,
-    {
-        "summary": "summary",  # 齊全 -> 下一關
-        "reflection": "reflection",  # 缺 -> 追問
-    },
-)
-workflow_streamlit.add_conditional_edges(
-    "evaluation",
-    route_after_evaluation,
-    {
-        "hmw_gen": "hmw_gen",  # 齊全 -> 下一關
-        "refine_ask": "refine_ask",  # 缺 -> 追問
-    },
-)
-workflow_streamlit.add_conditional_edges(
-    "cross_silo_evaluate",
-    route_after_cross_silo,
-    {"final_summary": "final_summary", END: END},
-)
-
+def build_workflow(entry: Optional[str] = None) -> StateGraph:
+    """Create workflow for Streamlit (skip greeting node with interrupt).
+
+    entry 指定時略過 route_start，直接從該節點開始執行。
+    """
+    workflow = StateGraph(State)
+
+    # Add nodes (no greeting node for Streamlit)
+    workflow.add_node("situation", node_situation)
+    workflow.add_node("reflection", node_reflection)
+    workflow.add_node("summary", node_summary)
+    workflow.add_node(
+        "evaluation",
+        node_evaluation_parallel
+        if config.evaluation_mode == "parallel"
+        else node_evaluation,
+    )
+    workflow.add_node("refine_ask", node_refine_ask)
+    workflow.add_node("refine_escalate", node_refine_escalate)
+    workflow.add_node("hmw_gen", node_hmw_gen)
+    workflow.add_node(
+        "cross_silo_ask",
+        node_cross_silo_ask_parallel
+        if config.cross_silo_mode == "map_reduce"
+        else node_cross_silo_ask,
+    )
+    workflow.add_node("cross_silo_evaluate", node_cross_silo_evaluate)
+    workflow.add_node(
+        "final_summary",
+        node_final_summary_parallel
+        if config.final_summary_mode == "parallel"
+        else node_final_summary,
+    )
+    workflow.add_node(
+        "file_export",
+        node_file_export_deterministic
+        if config.file_export_mode == "deterministic"
+        else node_file_export_adaptive,
+    )
+    workflow.add_node("what_if", node_what_if)
+    workflow.add_node("tools", ToolNode(tools))
+    # Define entry point routing
+    # 指定 entry 時直接從該節點開始 (重跑下游子圖)
+    if entry is not None:
+        workflow.add_edge(START, entry)
+    else:
+        workflow.add_conditional_edges(
+            START,
+            route_start,
+            {
+                "situation": "situation",
+                "cross_silo_evaluate": "cross_silo_evaluate",
+                "file_export": "file_export",
+                "what_if": "what_if",
+                "evaluation": "evaluation",
+            },
+        )
+
+    workflow.add_edge("reflection", END)
+    workflow.add_edge("summary", "evaluation")
+    workflow.add_conditional_edges(
+        "refine_ask",
+        route_after_refine_ask,
+        {"refine_escalate": "refine_escalate", END: END},
+    )
+    workflow.add_edge("refine_escalate", "hmw_gen")
+    workflow.add_edge("hmw_gen", "cross_silo_ask")
+    workflow.add_edge("cross_silo_ask", END)
+    workflow.add_edge("final_summary", "file_export")
+    workflow.add_edge("what_if", END)
+    workflow.add_edge("tools", END)
+
+    workflow.add_conditional_edges(
+        "situation",
+        route_after_situation,
+        {
+            "summary": "summary",  # 齊全 -> 下一關
+            "evaluation": "evaluation",  # 降載 -> 略過 summary
+            "hmw_gen": "hmw_gen",  # 未變動且已通過 -> 沿用評估
+            "refine_ask": "refine_ask",  # 未變動且未通過 -> 沿用評估
+            "refine_escalate": "refine_escalate",  # 追問已達上限
+            "reflection": "reflection",  # 缺 -> 追問
+        },
+    )
+    workflow.add_conditional_edges(
+        "evaluation",
+        route_after_evaluation,
+        {
+            "hmw_gen": "hmw_gen",  # 齊全 -> 下一關
+            "refine_ask": "refine_ask",  # 缺 -> 追問
+            "refine_escalate": "refine_escalate",  # 追問已達上限
+        },
+    )
+    workflow.add_conditional_edges(
+        "cross_silo_evaluate",
+        route_after_cross_silo,
+        {"final_summary": "final_summary", END: END},
+    )
+
+    # file_export 決定是否調用工具
+    workflow.add_conditional_edges(
+        "file_export",
+        tools_condition,
+    )
+    return workflow
+
+
+workflow_streamlit = build_workflow()
+graph = workflow_streamlit.compile()
 
-# file_export 決定是否調用工具
-workflow_streamlit.add_conditional_edges(
-    "file_export",
-    tools_condition,
-)
 
-graph = workflow_streamlit.compile()
-graph_image = graph.get_graph().draw_mermaid_png()
-with open("graph.png", "wb") as f:
-    f.write(graph_image)
+if __name__ == "__main__":
+    # 重新產生流程圖：uv run python -m src.graph (需連線 mermaid.ink)
+    graph_image = graph.get_graph().draw_mermaid_png()
+    with open("graph.png", "wb") as f:
+        f.write(graph_image)
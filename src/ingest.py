@@ -0,0 +1,216 @@
+"""Problem-profile extraction from uploaded documents (txt / md / docx).
+
+- 文件以串流方式逐段讀取並切成 chunk，不會一次把整份文件載入記憶體
+- 各 chunk 以 ProblemExtraction 平行萃取 (Map)，同時進行的呼叫數有上限
+- 萃取結果去除重複後整合成 problem_profile 與 job_title (Reduce)
+- 資訊齊全時 graph 直接從 evaluation 開始
+"""
+
+import asyncio
+import codecs
+import itertools
+import os
+import zipfile
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import IO, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+from xml.etree.ElementTree import ParseError, iterparse
+
+from langchain_core.messages import SystemMessage
+
+from src.config import config
+from src.llm import model_strict
+from src.logger import logger
+from src.profile_tracking import append_fragment
+from src.state import ProblemExtraction
+
+SUPPORTED_TYPES = ["txt", "md", "docx"]
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_READ_BLOCK = 64 * 1024
+
+
+class DocumentError(ValueError):
+    """文件格式不支援或內容損毀，無法讀取"""
+
+
+@dataclass
+class DocumentIntake:
+    filename: str
+    job_title: str
+    pain_point: Optional[str]
+    goal: Optional[str]
+    chunks: int
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(self.pain_point and self.goal)
+
+    def profile(self) -> dict:
+        return {"pain_point": self.pain_point, "goal": self.goal}
+
+    def message(self) -> str:
+        """萃取結果轉成對話紀錄中的用戶訊息"""
+        return "\n".join(
+            [
+                f"📄 已上傳文件「{self.filename}」(共 {self.chunks} 段)",
+                f"- 職位：{self.job_title or '未提及'}",
+                f"- 痛點：{self.pain_point or '未提及'}",
+                f"- 目標：{self.goal or '未提及'}",
+            ]
+        )
+
+
+def _text_paragraphs(file: IO[bytes]) -> Iterator[str]:
+    """逐塊讀取並解碼文字檔，以行為單位輸出"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        block = file.read(_READ_BLOCK)
+        pending += decoder.decode(block, final=not block)
+        *lines, pending = pending.split("\n")
+        yield from lines
+        if not block:
+            break
+    if pending:
+        yield pending
+
+
+def _docx_paragraphs(file: IO[bytes]) -> Iterator[str]:
+    """串流解析 word/document.xml，逐段輸出文字"""
+    try:
+        with zipfile.ZipFile(file) as archive, archive.open(
+            "word/document.xml"
+        ) as xml:
+            for _, elem in iterparse(xml, events=("end",)):
+                if elem.tag == f"{_WORD_NS}p":
+                    yield "".join(t.text or "" for t in elem.iter(f"{_WORD_NS}t"))
+                    elem.clear()
+    except (zipfile.BadZipFile, KeyError, ParseError, zlib.error) as e:
+        raise DocumentError(f"docx 檔案損毀或格式不正確 ({e})") from e
+
+
+def iter_chunks(file: IO[bytes], filename: str, chunk_chars: int) -> Iterator[str]:
+    """依段落切成不超過 chunk_chars 字的 chunk"""
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension not in SUPPORTED_TYPES:
+        raise DocumentError(f"Unsupported document type: {filename}")
+    if extension == "docx":
+        paragraphs = _docx_paragraphs(file)
+    else:
+        paragraphs = _text_paragraphs(file)
+
+    buffer: List[str] = []
+    size = 0
+    for paragraph in paragraphs:
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if size + len(paragraph) > chunk_chars and buffer:
+            yield "\n".join(buffer)
+            buffer, size = [], 0
+        # 過長的段落直接切開
+        while len(paragraph) > chunk_chars:
+            yield paragraph[:chunk_chars]
+            paragraph = paragraph[chunk_chars:]
+        if paragraph:
+            buffer.append(paragraph)
+            size += len(paragraph)
+    if buffer:
+        yield "\n".join(buffer)
+
+
+async def _bounded_map(
+    chunks: Iterator[str],
+    extract: Callable[[str], Awaitable[Optional[ProblemExtraction]]],
+    limit: int,
+) -> AsyncIterator[Optional[ProblemExtraction]]:
+    """最多同時處理 limit 個 chunk，完成一個才讀下一個"""
+    pending = set()
+    try:
+        for chunk in chunks:
+            if len(pending) >= limit:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(extract(chunk)))
+        for task in asyncio.as_completed(pending):
+            yield await task
+    finally:
+        # 讀取文件失敗時不再等待其他 chunk 的 LLM 呼叫
+        for task in pending:
+            task.cancel()
+
+
+async def extract_document_profile(
+    file: IO[bytes], filename: str, callbacks: Optional[list] = None
+) -> DocumentIntake:
+    """從文件萃取 problem_profile 與 job_title"""
+    run_config = {"callbacks": callbacks or []}
+    structured_model = model_strict.with_structured_output(ProblemExtraction)
+
+    async def extract(chunk: str) -> Optional[ProblemExtraction]:
+        prompt = f"""
+        你是一個策略顧問，專門協助企業高層釐清他的職位與專案目標。
+        以下是主管提供的文件其中一段，請萃取主管的職位(job_title), 痛點(pain_point), 目標(goal)。
+        規則：
+        - 只萃取這一段明確提到的資訊，未提及的請回傳 None
+        - 每項用一句具體的話描述
+        文件內容：
+        {chunk}
+        """
+        try:
+            return await structured_model.ainvoke(
+                [SystemMessage(content=prompt)], config=run_config
+            )
+        except Exception as e:
+            logger.warning(f"Document chunk extraction failed: {e}")
+            return None
+
+    # 超過 chunk 上限的部分不再讀取
+    chunks = itertools.islice(
+        iter_chunks(file, filename, config.ingest_chunk_chars),
+        config.ingest_max_chunks,
+    )
+
+    # Reduce：邊完成邊合併，不保留各 chunk 的原文
+    pain_point = goal = None
+    job_titles: Counter = Counter()
+    count = 0
+    async for result in _bounded_map(chunks, extract, config.ingest_max_concurrency):
+        count += 1
+        if result is None:
+            continue
+        pain_point = append_fragment(pain_point, result.pain_point)
+        goal = append_fragment(goal, result.goal)
+        if result.job_title:
+            job_titles[result.job_title.strip()] += 1
+    logger.info(f"Document {filename}: {count} chunks extracted")
+
+    # 多段片段時再整合成精簡的一句
+    if count > 1 and (pain_point or goal):
+        prompt = f"""
+        以下是從同一份文件各段萃取的片段，請各整合成一句具體的話，不要遺漏關鍵數字。
+        痛點片段：{pain_point}
+        目標片段：{goal}
+        職位：{job_titles.most_common(1)[0][0] if job_titles else None}
+        """
+        try:
+            merged = await structured_model.ainvoke(
+                [SystemMessage(content=prompt)], config=run_config
+            )
+            pain_point = merged.pain_point or pain_point
+            goal = merged.goal or goal
+        except Exception as e:
+            # 整合失敗時沿用去重後的片段
+            logger.warning(f"Document profile merge failed: {e}")
+
+    return DocumentIntake(
+        filename=filename,
+        job_title=job_titles.most_common(1)[0][0] if job_titles else "",
+        pain_point=pain_point,
+        goal=goal,
+        chunks=count,
+    )
@@ -0,0 +1,91 @@
+"""Structured intake form as an alternative to multi-turn chat extraction.
+
+- IntakeForm：表單欄位直接組成 problem_profile 與 job_title，graph 由 evaluation 進入
+- IntakeMetrics：依輸入模式 (chat / form) 統計每個 session 到第一次評分所需的輪數與 LLM 呼叫數
+"""
+
+import threading
+from dataclasses import dataclass, fields
+from typing import Dict, List
+
+from src.logger import logger
+
+FORM_LABELS = {
+    "job_title": "職位",
+    "who": "誰遇到問題",
+    "situation": "在什麼情境下",
+    "obstacle": "遇到什麼阻礙",
+    "goal": "想達成的目標",
+    "metric": "量化的成功指標",
+}
+
+
+@dataclass
+class IntakeForm:
+    job_title: str
+    who: str
+    situation: str
+    obstacle: str
+    goal: str
+    metric: str
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.missing_fields()
+
+    def missing_fields(self) -> List[str]:
+        return [
+            FORM_LABELS[f.name]
+            for f in fields(self)
+            if not getattr(self, f.name).strip()
+        ]
+
+    def profile(self) -> dict:
+        return {
+            "pain_point": f"{self.who.strip()}在{self.situation.strip()}時，"
+            f"遇到{self.obstacle.strip()}",
+            "goal": f"{self.goal.strip()}，成功指標：{self.metric.strip()}",
+        }
+
+    def message(self) -> str:
+        """表單內容轉成對話紀錄中的用戶訊息"""
+        return "\n".join(
+            f"- {FORM_LABELS[f.name]}：{getattr(self, f.name).strip()}"
+            for f in fields(self)
+        )
+
+
+class IntakeMetrics:
+    """統計各輸入模式到達第一次評分的輪數與 LLM 呼叫數"""
+
+    def __init__(self):
+        self._totals: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, turns: int, llm_calls: int) -> None:
+        with self._lock:
+            sessions, total_turns, total_calls = self._totals.get(mode, [0, 0, 0])
+            self._totals[mode] = [
+                sessions + 1,
+                total_turns + turns,
+                total_calls + llm_calls,
+            ]
+        logger.info(
+            f"Intake ({mode}) scored after {turns} turns, {llm_calls} LLM calls; "
+            f"{self.summary()}"
+        )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """各模式的 session 數、平均輪數與平均 LLM 呼叫數"""
+        with self._lock:
+            return {
+                mode: {
+                    "sessions": sessions,
+                    "avg_turns": round(total_turns / sessions, 2),
+                    "avg_llm_calls": round(total_calls / sessions, 2),
+                }
+                for mode, (sessions, total_turns, total_calls) in self._totals.items()
+            }
+
+
+intake_metrics = IntakeMetrics()
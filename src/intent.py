@@ -0,0 +1,150 @@
+"""Local yes / no / no-change classifier for short confirmation replies.
+
+用詞典與字元 n-gram 相似度判斷主管的簡短回覆 (中英文)，並給出信心分數：
+- 與詞典完全相符 (去除語助詞後) 時信心為 1.0
+- 否定前綴加上同意詞 (「不好」「不對」「不是」) 視為拒絕
+- 否則取與各意圖詞典詞的最高 Dice 相似度；回覆與詞典詞的否定與否不一致時
+  相似度減半，回覆越長信心越低
+高信心的回覆由節點直接處理，其餘才交給 LLM 判斷。
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+from src.config import config
+from src.logger import logger
+from src.profile_tracking import normalize
+
+YES = "yes"
+NO = "no"
+NO_CHANGE = "no_change"
+UNKNOWN = "unknown"
+
+# 詞典詞以空白分隔；英文多字詞以 - 連接 (normalize 後去除，否定詞仍可用 \b 判斷)
+LEXICON: Dict[str, list] = {
+    YES: """
+        好 好的 好啊 可以 可以啊 要 需要 是 是的 對 對的 沒問題 當然 當然好
+        麻煩了 麻煩你 請幫我做 幫我做 做吧 產生吧 來吧 好請產生
+        ok okay yes yep yeah sure please go-ahead do-it sounds-good yes-please
+    """.split(),
+    NO: """
+        不用 不用了 不要 不需要 先不用 先不要 暫時不用 算了 免了 不必 不用麻煩
+        no nope no-thanks not-now skip dont no-need
+    """.split(),
+    NO_CHANGE: """
+        正確 沒錯 都對 都正確 資訊正確 正確沒有要補充 沒有要補充 沒有補充 不用補充
+        無需補充 沒有其他 沒有了 就這樣 這樣就好 這樣可以 以上正確
+        correct thats-all nothing-to-add looks-right all-good no-changes thats-right
+    """.split(),
+}
+
+# 比對前去除的客套詞與語助詞
+_FILLER_RE = re.compile(r"(謝謝|感謝|謝啦|thankyou|thanks|thx|啊|喔|哦|囉|啦|呀|唷|耶)")
+# 否定詞在 normalize 之前比對：英文需是完整的字，「know」「now」不算否定
+_NEGATION_RE = re.compile(r"[不沒別無]|\b(?:not|no|dont|don't)\b")
+_NEGATION_PREFIX_RE = re.compile(r"^\W*(?:[不沒別]|(?:not|no|dont|don't)\b)")
+# 超過這個長度的回覆通常帶有新內容，信心依長度遞減
+SHORT_REPLY_LENGTH = 10
+
+
+def _ngrams(text: str) -> Set[str]:
+    grams = set()
+    for n in (1, 2, 3):
+        grams.update(text[i : i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def _is_negated(text: str) -> bool:
+    return bool(_NEGATION_RE.search(text.lower()))
+
+
+@dataclass
+class IntentResult:
+    intent: str
+    confidence: float
+
+
+class IntentClassifier:
+    def __init__(self, lexicon: Dict[str, list], threshold: float):
+        self.threshold = threshold
+        self._exact = {
+            normalize(phrase): intent
+            for intent, phrases in lexicon.items()
+            for phrase in phrases
+        }
+        # (n-gram, 是否含否定詞)
+        self._grams = {
+            intent: [
+                (_ngrams(normalize(phrase)), _is_negated(phrase))
+                for phrase in phrases
+            ]
+            for intent, phrases in lexicon.items()
+        }
+        self.decisions: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def classify(
+        self, text: str, intents: Optional[Iterable[str]] = None
+    ) -> IntentResult:
+        """判斷回覆的意圖；intents 限定可能的意圖 (例如只分辨同意或拒絕)"""
+        candidates = set(intents or self._grams)
+        cleaned = _FILLER_RE.sub("", normalize(text))
+        if not cleaned:
+            return IntentResult(UNKNOWN, 0.0)
+
+        exact = self._exact.get(cleaned)
+        if exact is not None:
+            if exact in candidates:
+                return IntentResult(exact, 1.0)
+            return IntentResult(UNKNOWN, 0.0)
+
+        # 「不好」「不對」「不是」：否定前綴加上同意詞
+        lowered = text.lower()
+        negation = _NEGATION_PREFIX_RE.match(lowered)
+        rest = negation and _FILLER_RE.sub("", normalize(lowered[negation.end() :]))
+        if rest and self._exact.get(rest) == YES:
+            if NO in candidates:
+                return IntentResult(NO, 1.0)
+            return IntentResult(UNKNOWN, 0.0)
+
+        grams = _ngrams(cleaned)
+        negated = _is_negated(text)
+        scores = {
+            intent: max(
+                2
+                * len(grams & other)
+                / (len(grams) + len(other))
+                * (1.0 if other_negated == negated else 0.5)
+                for other, other_negated in self._grams[intent]
+            )
+            for intent in candidates
+        }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        intent, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        # 與次高的意圖差距越小、回覆越長，信心越低
+        confidence = best * (1 - runner_up / best / 2) if best else 0.0
+        if len(cleaned) > SHORT_REPLY_LENGTH:
+            confidence *= SHORT_REPLY_LENGTH / len(cleaned)
+        return IntentResult(intent, round(confidence, 3))
+
+    def decide(
+        self, context: str, text: str, intents: Optional[Iterable[str]] = None
+    ) -> Optional[str]:
+        """信心足夠時回傳意圖，否則回傳 None 交由 LLM 判斷"""
+        result = self.classify(text, intents)
+        confident = result.confidence >= self.threshold
+        with self._lock:
+            self.decisions[(context, "local" if confident else "llm")] += 1
+        logger.info(
+            f"Intent ({context}): {result.intent} {result.confidence:.2f} -> "
+            f"{'local' if confident else 'llm'}; {dict(self.decisions)}"
+        )
+        return result.intent if confident else None
+
+
+intent_classifier = IntentClassifier(LEXICON, config.intent_confidence_threshold)
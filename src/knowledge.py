@@ -0,0 +1,296 @@
+"""Local knowledge base of the resources departments typically provide.
+
+內部目錄 (職位、問題關鍵字、部門、資源、例子) 存在 SQLite，啟動時載入記憶體索引：
+- 職位與關鍵字都是短字串，查詢時列舉輸入文字的子字串做字典查找，不需掃描整個目錄
+- 先以部門彙總分數，只對前幾名部門的條目排序；數百筆的目錄查詢約數十微秒
+- 命中的條目放進跨部門視角的 prompt，讓模型確認並調整草稿，而不是每次從頭列出部門與資源
+- 模型產生的部門名稱 (「資訊部門」、「IT 部」) 去除「部門 / 部 / 處」等字尾後再與目錄比對
+
+目錄 CSV / JSONL 欄位：role, department, keywords (以 ; 或 , 分隔), resource, example
+
+Usage:
+    uv run python -m src.knowledge load catalog.csv [--db data/department_knowledge.sqlite] [--replace]
+    uv run python -m src.knowledge lookup "業務總監" "客戶流失率很高" [--department 資訊部門]
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.config import config
+from src.logger import logger
+from src.profile_tracking import normalize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL,
+    department TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    example TEXT NOT NULL DEFAULT ''
+);
+"""
+_KEYWORD_SPLIT_RE = re.compile(r"[;,，、；]")
+# 職位命中的權重高於單一關鍵字
+ROLE_WEIGHT = 2.0
+KEYWORD_WEIGHT = 1.0
+# 比對部門名稱時去除的字尾，長的在前
+_DEPARTMENT_SUFFIX_RE = re.compile(
+    r"(部門|事業部|中心|團隊|單位|部|處|室|組|課|department|dept|team)$"
+)
+# 常見的英文縮寫與中文名稱視為同一部門
+DEPARTMENT_ALIASES = {
+    "it": "資訊",
+    "mis": "資訊",
+    "hr": "人資",
+    "人力資源": "人資",
+    "sales": "業務",
+    "marketing": "行銷",
+    "finance": "財務",
+    "cs": "客服",
+    "客戶服務": "客服",
+    "logistics": "物流",
+}
+
+
+@dataclass
+class ResourceEntry:
+    role: str
+    department: str
+    keywords: List[str]
+    resource: str
+    example: str = ""
+
+
+def department_key(name: Optional[str]) -> str:
+    """部門名稱正規化：去除空白、標點與「部門 / 部」等字尾，並換成別名"""
+    key = normalize(name)
+    stripped = _DEPARTMENT_SUFFIX_RE.sub("", key)
+    key = stripped or key
+    return DEPARTMENT_ALIASES.get(key, key)
+
+
+def iter_catalog(path: str) -> Iterator[ResourceEntry]:
+    """讀取 CSV 或 JSONL 格式的目錄"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows: Iterable[dict] = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            keywords = row.get("keywords") or []
+            if isinstance(keywords, str):
+                keywords = _KEYWORD_SPLIT_RE.split(keywords)
+            yield ResourceEntry(
+                role=(row.get("role") or "").strip(),
+                department=row["department"].strip(),
+                keywords=[k.strip() for k in keywords if k.strip()],
+                resource=row["resource"].strip(),
+                example=(row.get("example") or "").strip(),
+            )
+
+
+def load_catalog(
+    entries: Iterable[ResourceEntry], db_path: str, replace: bool = False
+) -> int:
+    """將目錄寫入 SQLite，回傳寫入筆數"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(SCHEMA)
+        if replace:
+            conn.execute("DELETE FROM resources")
+        cursor = conn.executemany(
+            "INSERT INTO resources (role, department, keywords, resource, example) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (e.role, e.department, ";".join(e.keywords), e.resource, e.example)
+                for e in entries
+            ),
+        )
+        return cursor.rowcount
+
+
+class KnowledgeIndex:
+    """職位與關鍵字到資源條目的記憶體索引"""
+
+    def __init__(self, entries: Iterable[ResourceEntry]):
+        self.entries: List[ResourceEntry] = []
+        # term -> department -> entry ids；查詢時先以部門彙總分數，只展開前幾名部門
+        self._roles: Dict[str, Dict[str, List[int]]] = {}
+        self._keywords: Dict[str, Dict[str, List[int]]] = {}
+        self._term_lengths: Set[int] = set()
+        # 目錄中的部門名稱 -> department_key
+        self._department_keys: Dict[str, str] = {}
+        for entry in entries:
+            entry_id = len(self.entries)
+            self.entries.append(entry)
+            self._department_keys.setdefault(
+                entry.department, department_key(entry.department)
+            )
+            for term, table in [(entry.role, self._roles)] + [
+                (k, self._keywords) for k in entry.keywords
+            ]:
+                term = normalize(term)
+                if term:
+                    departments = table.setdefault(term, defaultdict(list))
+                    departments[entry.department].append(entry_id)
+                    self._term_lengths.add(len(term))
+
+    @classmethod
+    def from_sqlite(cls, db_path: str) -> "KnowledgeIndex":
+        if not os.path.exists(db_path):
+            return cls([])
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT role, department, keywords, resource, example FROM resources"
+            ).fetchall()
+        return cls(
+            ResourceEntry(role, department, keywords.split(";"), resource, example)
+            for role, department, keywords, resource, example in rows
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _terms(self, text: str) -> Set[str]:
+        """文字中與索引詞等長的所有子字串"""
+        text = normalize(text)
+        return {
+            text[i : i + n]
+            for n in self._term_lengths
+            for i in range(len(text) - n + 1)
+        }
+
+    def match_departments(self, name: str) -> Set[str]:
+        """目錄中與 name 指同一部門的名稱；正規化後相同或互相包含 (至少兩個字)"""
+        key = department_key(name)
+        if not key:
+            return set()
+        exact = {d for d, k in self._department_keys.items() if k == key}
+        if exact or len(key) < 2:
+            return exact
+        return {
+            d
+            for d, k in self._department_keys.items()
+            if len(k) >= 2 and (k in key or key in k)
+        }
+
+    def lookup(
+        self,
+        job_title: Optional[str],
+        text: Optional[str],
+        k: int = 4,
+        department: Optional[str] = None,
+    ) -> List[Tuple[str, List[ResourceEntry]]]:
+        """依職位與問題文字找出最相關的 k 個部門與其資源條目
+
+        指定 department 時先篩選出同一部門再排序，不會因為排在前 k 名之外而漏掉。
+        """
+        if not self.entries:
+            return []
+        allowed = None
+        if department is not None:
+            allowed = self.match_departments(department)
+            if not allowed:
+                return []
+        matched = [
+            (self._roles[term], ROLE_WEIGHT)
+            for term in self._terms(job_title or "")
+            if term in self._roles
+        ] + [
+            (self._keywords[term], KEYWORD_WEIGHT)
+            for term in self._terms(text or "")
+            if term in self._keywords
+        ]
+
+        department_scores: Dict[str, float] = defaultdict(float)
+        for departments, weight in matched:
+            for name, entry_ids in departments.items():
+                if allowed is None or name in allowed:
+                    department_scores[name] += weight * len(entry_ids)
+        top = sorted(department_scores, key=department_scores.get, reverse=True)[:k]
+
+        results = []
+        for name in top:
+            scores: Dict[int, float] = defaultdict(float)
+            for departments, weight in matched:
+                for entry_id in departments.get(name, ()):
+                    scores[entry_id] += weight
+            best = sorted(scores, key=scores.get, reverse=True)[:3]
+            results.append((name, [self.entries[i] for i in best]))
+        return results
+
+
+def knowledge_prompt(
+    job_title: Optional[str], text: Optional[str], department: Optional[str] = None
+) -> str:
+    """格式化成放進 prompt 的參考資料；未啟用或沒有命中時回傳空字串
+
+    指定 department 時只保留同一部門 (名稱正規化後比對) 的條目。
+    """
+    if not config.knowledge_enabled:
+        return ""
+    matches = get_knowledge_index().lookup(
+        job_title, text, config.knowledge_top_k, department
+    )
+    if not matches:
+        return ""
+    lines = ["公司內部的部門資源目錄 (請以此為草稿確認並依本案調整，不要從頭撰寫)："]
+    for department, entries in matches:
+        for entry in entries:
+            example = f" (例：{entry.example})" if entry.example else ""
+            lines.append(f"- {department}：{entry.resource}{example}")
+    return "\n    ".join(lines)
+
+
+_knowledge_index: Optional[KnowledgeIndex] = None
+_knowledge_index_lock = threading.Lock()
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """第一次使用時從 SQLite 載入，整個 process 共用"""
+    global _knowledge_index
+    with _knowledge_index_lock:
+        if _knowledge_index is None:
+            _knowledge_index = KnowledgeIndex.from_sqlite(config.knowledge_db_path)
+            logger.info(f"Knowledge index loaded: {len(_knowledge_index)} entries")
+    return _knowledge_index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--db", default=config.knowledge_db_path, help="SQLite path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="load a CSV / JSONL catalog")
+    load.add_argument("catalog")
+    load.add_argument("--replace", action="store_true", help="drop existing entries")
+    lookup = commands.add_parser("lookup", help="look up a role and problem text")
+    lookup.add_argument("job_title")
+    lookup.add_argument("text")
+    lookup.add_argument("--department", help="only entries of this department")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        count = load_catalog(iter_catalog(args.catalog), args.db, args.replace)
+        print(f"loaded {count} entries into {args.db}")
+    else:
+        index = KnowledgeIndex.from_sqlite(args.db)
+        matches = index.lookup(args.job_title, args.text, department=args.department)
+        for department, entries in matches:
+            print(department)
+            for entry in entries:
+                print(f"  - {entry.resource}")
+
+
+if __name__ == "__main__":
+    main()
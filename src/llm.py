@@ -1,15 +1,27 @@
 from langchain_openai import ChatOpenAI
 
+from src.cassette import cassette_clients
 from src.config import config
+from src.overload import load_tracker
 from src.tool import generate_ppt
 
 
-def get_model(temperature: float = None) -> ChatOpenAI:
+def get_model(
+    temperature: float = None, max_tokens: int = None, model_name: str = None
+) -> ChatOpenAI:
     """Factory function to create a ChatOpenAI instance with specific configuration."""
+    api_key = config.openai_api_key
+    if config.cassette_mode == "replay" and not api_key:
+        api_key = "cassette-replay"  # 離線回放不需要真的 API key
     return ChatOpenAI(
-        openai_api_key=config.openai_api_key,
-        model=config.model_name,
+        openai_api_key=api_key,
+        model=model_name or config.model_name,
         temperature=temperature if temperature is not None else config.temperature,
+        max_tokens=max_tokens,
+        callbacks=[load_tracker] if load_tracker else None,
+        **cassette_clients(
+            config.cassette_mode, config.cassette_path, config.cassette_latency_scale
+        ),
     )
 
 
@@ -19,6 +31,43 @@ model = get_model()
 # Specialized models
 model_strict = get_model(temperature=config.strict_temperature)
 model_creative = get_model(temperature=config.creative_temperature)
+# 短回覆模型：用於平行的子任務，限制輸出長度
+model_brief = get_model(max_tokens=config.cross_silo_department_max_tokens)
+# 評分模型：用於各維度平行評分，只輸出分數與一句理由
+model_scorer = get_model(
+    temperature=config.strict_temperature,
+    max_tokens=config.evaluation_dimension_max_tokens,
+)
+
+# 過載時使用的降載模型：較便宜的模型與較短的輸出
+_degraded_models = {
+    id(model): get_model(
+        max_tokens=config.degraded_max_tokens, model_name=config.degraded_model_name
+    ),
+    id(model_strict): get_model(
+        temperature=config.strict_temperature,
+        max_tokens=config.degraded_max_tokens,
+        model_name=config.degraded_model_name,
+    ),
+    id(model_creative): get_model(
+        temperature=config.creative_temperature,
+        max_tokens=config.degraded_max_tokens,
+        model_name=config.degraded_model_name,
+    ),
+    # 已有較短的輸出上限，只換成降載模型
+    id(model_brief): get_model(
+        max_tokens=config.cross_silo_department_max_tokens,
+        model_name=config.degraded_model_name,
+    ),
+}
+
+
+def for_state(llm: ChatOpenAI, state) -> ChatOpenAI:
+    """session 處於降載模式時改用對應的降載模型."""
+    if getattr(state, "degraded", False):
+        return _degraded_models.get(id(llm), llm)
+    return llm
+
 
 tools = [generate_ppt]
 model_with_tools = model.bind_tools(tools)
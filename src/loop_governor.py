@@ -0,0 +1,91 @@
+"""Per-session bounds on the refine and cross-silo follow-up loops.
+
+- State.loop_counts 記錄每個迴圈已執行的次數，超過上限就改走結束路徑
+- 新的追問與先前的追問幾乎相同 (字元 bigram 相似度) 時也視為原地打轉
+- refine 迴圈結束時沿用目前分數最高的 profile 繼續；cross-silo 迴圈直接進入總結
+- 每次迴圈與升級都會記錄，最壞情況下每個 session 的 LLM 呼叫數有上限
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from src.config import config
+from src.logger import logger
+from src.profile_tracking import normalize
+
+REFINE_LOOP = "refine_ask"
+CROSS_SILO_LOOP = "cross_silo"
+# 每個迴圈保留最近幾則追問用來比對
+MAX_REMEMBERED_QUESTIONS = 5
+
+
+def _bigrams(text: str) -> set:
+    text = normalize(text)
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def question_similarity(a: str, b: str) -> float:
+    """兩則追問的字元 bigram Jaccard 相似度"""
+    grams_a, grams_b = _bigrams(a), _bigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class LoopGovernor:
+    def __init__(self, limits: Dict[str, int], duplicate_threshold: float):
+        self.limits = limits
+        self.duplicate_threshold = duplicate_threshold
+        self.iterations: Counter = Counter()
+        self.escalations: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def exhausted(self, loop: str, loop_counts: dict) -> bool:
+        """迴圈次數是否已達上限"""
+        exhausted = loop_counts.get(loop, 0) >= self.limits[loop]
+        if exhausted:
+            self._escalate(loop, "limit")
+        return exhausted
+
+    def is_repeating(self, loop: str, loop_questions: dict, question: str) -> bool:
+        """新追問是否與先前的追問幾乎相同"""
+        best = max(
+            (question_similarity(question, q) for q in loop_questions.get(loop, [])),
+            default=0.0,
+        )
+        repeating = best >= self.duplicate_threshold
+        if repeating:
+            self._escalate(loop, "duplicate", f"similarity {best:.2f}")
+        return repeating
+
+    def record(
+        self, loop: str, loop_counts: dict, loop_questions: dict, question: str
+    ):
+        """記錄一次迴圈，回傳要寫回 State 的 loop_counts 與 loop_questions"""
+        with self._lock:
+            self.iterations[loop] += 1
+        counts = {**loop_counts, loop: loop_counts.get(loop, 0) + 1}
+        recent: List[str] = [*loop_questions.get(loop, []), question]
+        questions = {**loop_questions, loop: recent[-MAX_REMEMBERED_QUESTIONS:]}
+        logger.info(f"Loop {loop} iteration {counts[loop]}/{self.limits[loop]}")
+        return counts, questions
+
+    def _escalate(self, loop: str, reason: str, detail: Optional[str] = None) -> None:
+        with self._lock:
+            self.escalations[(loop, reason)] += 1
+        logger.warning(
+            f"Loop {loop} escalated ({reason}{', ' + detail if detail else ''}); "
+            f"iterations {dict(self.iterations)}, escalations {dict(self.escalations)}"
+        )
+
+
+loop_governor = LoopGovernor(
+    limits={
+        REFINE_LOOP: config.refine_max_loops,
+        CROSS_SILO_LOOP: config.cross_silo_max_loops,
+    },
+    duplicate_threshold=config.loop_duplicate_threshold,
+)
@@ -1,22 +1,38 @@
-from .cross_silo import node_cross_silo_ask, node_cross_silo_evaluate
-from .evaluation import node_evaluation
-from .file_export import node_file_export
-from .final_summary import node_final_summary
+from .cross_silo import (
+    node_cross_silo_ask,
+    node_cross_silo_ask_parallel,
+    node_cross_silo_evaluate,
+)
+from .evaluation import node_evaluation, node_evaluation_parallel
+from .file_export import (
+    node_file_export,
+    node_file_export_adaptive,
+    node_file_export_deterministic,
+)
+from .final_summary import node_final_summary, node_final_summary_parallel
 from .hmw import node_hmw_gen
-from .refine_ask import node_refine_ask
+from .refine_ask import node_refine_ask, node_refine_escalate
 from .reflection import node_reflection
 from .situation import node_situation
 from .summary import node_summary
+from .what_if import node_what_if
 
 __all__ = [
     "node_cross_silo_ask",
+    "node_cross_silo_ask_parallel",
     "node_cross_silo_evaluate",
     "node_evaluation",
+    "node_evaluation_parallel",
     "node_file_export",
+    "node_file_export_adaptive",
+    "node_file_export_deterministic",
     "node_final_summary",
+    "node_final_summary_parallel",
     "node_hmw_gen",
     "node_reflection",
     "node_refine_ask",
+    "node_refine_escalate",
     "node_situation",
     "node_summary",
+    "node_what_if",
 ]
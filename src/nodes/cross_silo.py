@@ -1,8 +1,30 @@
+import asyncio
+from typing import Optional
+
 from langchain_core.messages import AIMessage, SystemMessage
 
-from src.llm import model, model_strict
+from src.config import config
+from src.intent import NO_CHANGE, intent_classifier
+from src.knowledge import knowledge_prompt
+from src.llm import for_state, model, model_brief, model_strict
 from src.logger import logger
-from src.state import CrossSiloEvaluation, State
+from src.loop_governor import CROSS_SILO_LOOP, loop_governor
+from src.state import (
+    PASSING_SCORE,
+    CrossSiloEvaluation,
+    DepartmentList,
+    DepartmentPerspective,
+    State,
+)
+
+
+def _resource_reference(state: State, department: Optional[str] = None) -> str:
+    """從本地部門資源目錄找出相關條目，作為 prompt 中的草稿"""
+    text = " ".join(
+        [state.hmw_output or ""]
+        + [str(v) for v in state.problem_profile.values() if v]
+    )
+    return knowledge_prompt(state.job_title, text, department)
 
 
 async def node_cross_silo_ask(state: State):
@@ -15,11 +37,12 @@ async def node_cross_silo_ask(state: State):
     並從主管職位舉個例子，說明可能需要的資源。並詢問是否有要補充或是資訊是否正確。: 
     職位：{state.job_title}
     要解決的問題：{state.hmw_output}
+    {_resource_reference(state)}
     注意：
     - 只需回覆，無需多餘的說明或打招呼
     - 例子要從高層的職位出發，並且具體說明部門可能需要的資源
     """
-    msg = await model.ainvoke([SystemMessage(content=prompt)])
+    msg = await for_state(model, state).ainvoke([SystemMessage(content=prompt)])
     updated_result = f"AI Question: {msg.content}"
     logger.info(f"Cross-silo ask: {msg.content}")
     
@@ -34,6 +57,100 @@ async def node_cross_silo_ask(state: State):
     }
 
 
+# identify_departments / department_perspective / merge_perspectives 也供 what_if 使用
+async def identify_departments(state: State) -> list[str]:
+    """找出解決問題需要協作的部門 (Map 前的分派)"""
+    prompt = f"""
+    你是一位跨領域的策略顧問。
+    請列出要解決以下問題時，{state.job_title}最需要協作的部門，最多 {config.cross_silo_max_departments} 個。
+    職位：{state.job_title}
+    要解決的問題：{state.hmw_output}
+    {_resource_reference(state)}
+    注意：
+    - 只需部門名稱，不要說明
+    """
+    structured_model = for_state(
+        model_strict, state
+    ).with_structured_output(DepartmentList)
+    result = await structured_model.ainvoke([SystemMessage(content=prompt)])
+    departments = [d.strip() for d in result.departments if d and d.strip()]
+    # 去除重複並保留順序
+    return list(dict.fromkeys(departments))[: config.cross_silo_max_departments]
+
+
+async def department_perspective(state: State, department: str) -> dict:
+    """單一部門的資源視角 (Map)"""
+    prompt = f"""
+    你是一位跨領域的策略顧問，專門協助高層從跨部門的角度審視問題所需要的資源。
+    請只針對「{department}」說明：{state.job_title}要解決這個問題時，需要該部門提供哪些資源或能力，並舉一個具體例子。
+    職位：{state.job_title}
+    要解決的問題：{state.hmw_output}
+    {_resource_reference(state, department)}
+    注意：
+    - 資源最多三項，每項一句話
+    - 例子要從高層的職位出發，一到兩句話
+    """
+    structured_model = for_state(model_brief, state).with_structured_output(
+        DepartmentPerspective
+    )
+    result = await structured_model.ainvoke([SystemMessage(content=prompt)])
+    result.department = department
+    return result.model_dump()
+
+
+def merge_perspectives(state: State, perspectives: list[dict]) -> str:
+    """合併各部門視角成一則提問 (Reduce)"""
+    lines = [
+        f"從{state.job_title}職位來看，解決這個問題需要以下部門的協助：",
+        "",
+    ]
+    for p in perspectives:
+        lines.append(f"**{p['department']}**")
+        for resource in p["resources"]:
+            lines.append(f"- {resource}")
+        lines.append(f"- 例子：{p['example']}")
+        lines.append("")
+    lines.append("以上部門與資源是否正確？您還需要其他部門提供哪些資源或能力？")
+    return "\n".join(lines)
+
+
+async def node_cross_silo_ask_parallel(state: State):
+    """跨部門視角：各部門平行生成後合併 (Map-Reduce Ask Phase)"""
+    logger.info("=== 進入 node_cross_silo_ask_parallel ===")
+
+    departments = await identify_departments(state)
+    logger.info(f"Cross-silo departments: {departments}")
+
+    results = await asyncio.gather(
+        *[department_perspective(state, d) for d in departments],
+        return_exceptions=True,
+    )
+    perspectives = []
+    for department, result in zip(departments, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Cross-silo perspective failed for {department}: {result}")
+            continue
+        perspectives.append(result)
+
+    # 全部失敗時退回單次生成
+    if not perspectives:
+        return await node_cross_silo_ask(state)
+
+    content = merge_perspectives(state, perspectives)
+    logger.info(f"Cross-silo ask: {content}")
+
+    return {
+        "messages": [AIMessage(content=content)],
+        "cross_silo_evaluation": {
+            "result": f"AI Question: {content}",
+            "score": 0,
+        },
+        "department_perspectives": perspectives,
+        "node_status": "Asking cross-silo resources.",
+        "last_stage": "cross_silo_ask",
+    }
+
+
 async def node_cross_silo_evaluate(state: State):
     """跨部門視角：評估回答 (Evaluate Phase)"""
     logger.info("=== 進入 node_cross_silo_evaluate ===")
@@ -41,6 +158,25 @@ async def node_cross_silo_evaluate(state: State):
     last_message = state.messages[-1]
     updated_result = current_result + f"\nUser Answer: {last_message.content}"
 
+    # 主管只是確認內容正確、沒有要補充時，不必再評分，直接進入總結。
+    # 「要」「需要」「好」等同意詞在這裡通常代表還有要補充，因此只接受 NO_CHANGE
+    if (
+        config.intent_classifier_enabled
+        and intent_classifier.decide("cross_silo_evaluate", last_message.content)
+        == NO_CHANGE
+    ):
+        logger.info("Cross-silo answer confirmed locally")
+        return {
+            "messages": [AIMessage(content="您的回答已完整")],
+            "cross_silo_evaluation": {
+                "result": updated_result,
+                "score": PASSING_SCORE,  # 達到 route_after_cross_silo 的門檻
+                "advice": "",
+            },
+            "node_status": "Cross-silo perspectives confirmed.",
+            "last_stage": "cross_silo_evaluate",
+        }
+
     prompt = f"""
     你是一位跨領域的策略顧問，專門協助高層從跨部門的角度審視問題所需要的資源。
     根據先前的討論，繼續回答問題或是問一個問題引導主管深入思考。
@@ -48,21 +184,37 @@ async def node_cross_silo_evaluate(state: State):
     職位：{state.job_title}
     要解決的問題：{state.hmw_output}
     先前討論：{updated_result}
+    {_resource_reference(state)}
     
     注意：
     - 只需回覆，無需多餘的說明或打招呼
     - 例子要從高層的職位出發，並且具體說明部門可能需要的資源
     """
 
-    structured_model = model_strict.with_structured_output(CrossSiloEvaluation)
+    structured_model = for_state(
+        model_strict, state
+    ).with_structured_output(CrossSiloEvaluation)
     eval_result = await structured_model.ainvoke(
         [SystemMessage(content=prompt), last_message]
     )
 
     # based on score, decide whether to continue asking or not
-    if eval_result.score < 65:
-        response_content = eval_result.advice
-        updated_result += f"\nAI Advice: {response_content}"
+    loop_counts, loop_questions = state.loop_counts, state.loop_questions
+    escalated_loop = None
+    if eval_result.score < PASSING_SCORE:
+        # 重複追問或達到次數上限時直接進入總結
+        repeating = loop_governor.is_repeating(
+            CROSS_SILO_LOOP, loop_questions, eval_result.advice
+        )
+        loop_counts, loop_questions = loop_governor.record(
+            CROSS_SILO_LOOP, loop_counts, loop_questions, eval_result.advice
+        )
+        if repeating or loop_governor.exhausted(CROSS_SILO_LOOP, loop_counts):
+            escalated_loop = CROSS_SILO_LOOP
+            response_content = "跨部門的討論已涵蓋主要資源，直接為您整理策略報告。"
+        else:
+            response_content = eval_result.advice
+            updated_result += f"\nAI Advice: {response_content}"
     else:
         response_content = "您的回答已完整"
 
@@ -75,6 +227,9 @@ async def node_cross_silo_evaluate(state: State):
             "score": eval_result.score,
             "advice": eval_result.advice,
         },
+        "loop_counts": loop_counts,
+        "loop_questions": loop_questions,
+        "escalated_loop": escalated_loop,
         "node_status": "Cross-silo perspectives evaluated.",
         "last_stage": "cross_silo_evaluate",
     }
@@ -1,10 +1,46 @@
+import asyncio
 from typing import Any, Dict
 
 from langchain_core.messages import SystemMessage
 
-from src.llm import model_strict
+from src.llm import for_state, model_scorer, model_strict
 from src.logger import logger
-from src.state import ProblemEvaluation, State
+from src.profile_tracking import field_hashes
+from src.state import (
+    PASSING_SCORE,
+    DimensionScore,
+    EvaluationAdvice,
+    EvaluationCritique,
+    ProblemEvaluation,
+    State,
+)
+
+# 各評分維度：(EvaluationDimensions 欄位名稱, 滿分, 評分標準)
+DIMENSION_RUBRICS = [
+    (
+        "pain_point_score",
+        30,
+        """**Pain Point (30分)**
+    - 0-10分: 只說了感覺 (e.g., "很累", "很難")。
+    - 11-20分: 提到了大致狀況，但缺乏情境。
+    - 21-30分: 清楚描述了 "誰" 在 "什麼情境" 下遇到了 "什麼具體阻礙"。""",
+    ),
+    (
+        "goal_metric_score",
+        40,
+        """**Goal & Metric (40分)**
+    - 0-10分: 完全沒提到目標或數字。
+    - 11-25分: 有目標但無量化指標 (e.g., "想提升效率")。
+    - 26-40分: 有明確的成功定義與量化指標 (e.g., "提升 20% 轉換率")。""",
+    ),
+    (
+        "box_trap_score",
+        30,
+        """**Solution Bias (Box Trap) (30分)**
+    - 0分 (陷入框框): 用戶直接把 "解決方案" 當成問題 (e.g., "我需要導入 AI", "我需要做一個 App")。這不是問題，這是手段。
+    - 30分 (破框): 用戶專注於 "想解決的本質困難" 或 "想創造的價值"，而非限定某種工具。""",
+    ),
+]
 
 
 async def node_evaluation(state: State) -> Dict[str, Any]:
@@ -38,7 +74,9 @@ async def node_evaluation(state: State) -> Dict[str, Any]:
     - 30分 (破框): 用戶專注於 "想解決的本質困難" 或 "想創造的價值"，而非限定某種工具。
 
         """
-    structured_model = model_strict.with_structured_output(ProblemEvaluation)
+    structured_model = for_state(
+        model_strict, state
+    ).with_structured_output(ProblemEvaluation)
     last_message = state.messages[-1]
     messages_to_send = [SystemMessage(content=prompt), last_message]
     response = await structured_model.ainvoke(messages_to_send)
@@ -58,7 +96,7 @@ async def node_evaluation(state: State) -> Dict[str, Any]:
         {response.advice}
         """
 
-    if response.score >= 65:
+    if response.score >= PASSING_SCORE:
         response.is_passing = True
 
     eval_result = {
@@ -67,12 +105,118 @@ async def node_evaluation(state: State) -> Dict[str, Any]:
         "advice": response.advice,
         "missing_fields": response.missing_fields,
     }
+    return _evaluation_update(state, eval_result, response.is_passing)
+
+
+def _evaluation_update(
+    state: State, eval_result: dict, is_passing: bool
+) -> Dict[str, Any]:
+    """評估結果寫回 State，並保留分數最高的 profile"""
+    profile = state.problem_profile
+    # 保留分數最高的 profile，追問迴圈結束時沿用
+    best_evaluation = state.best_evaluation
+    if eval_result["score"] > best_evaluation.get("score", -1):
+        best_evaluation = {
+            "score": eval_result["score"],
+            "problem_profile": profile,
+            "evaluation_result": eval_result,
+        }
+
     logger.info(f"Returning evaluation_result: {eval_result}")
-    logger.info(f"is_passing_evaluation: {response.is_passing}")
+    logger.info(f"is_passing_evaluation: {is_passing}")
 
     return {
         "node_status": "output from evaluation.",
-        "is_passing_evaluation": response.is_passing,
+        "is_passing_evaluation": is_passing,
         "evaluation_result": eval_result,
+        "evaluated_profile_hashes": field_hashes(profile),
+        "best_evaluation": best_evaluation,
         "last_stage": "evaluation",
     }
+
+
+def _profile_block(profile: dict) -> str:
+    return f"""
+    痛點：{profile["pain_point"]}
+    目標：{profile["goal"]}
+    """
+
+
+async def _score_dimension(state: State, max_score: int, rubric: str) -> DimensionScore:
+    """單一維度評分，只回傳分數與一句理由"""
+    prompt = f"""
+    你是一位專精於「破框思維」的台灣策略顧問，請只針對以下這個維度，嚴格評估用戶的問題陳述。
+    {_profile_block(state.problem_profile)}
+    {rubric}
+    注意：
+    - score 為 0 到 {max_score} 的整數
+    - reason 只用一句話
+    """
+    structured_model = model_scorer.with_structured_output(DimensionScore)
+    result = await structured_model.ainvoke([SystemMessage(content=prompt)])
+    result.score = min(max(result.score, 0), max_score)
+    return result
+
+
+async def _critique(state: State, reasons: str) -> str:
+    prompt = f"""
+    你是一位專精於「破框思維」的台灣策略顧問，用親切且中肯的語氣評論用戶的問題陳述。
+    {_profile_block(state.problem_profile)}
+    各維度評分理由：{reasons}
+    請給出一段犀利但中肯的評語，不超過 100 字。
+    """
+    structured_model = for_state(model_strict, state).with_structured_output(
+        EvaluationCritique
+    )
+    result = await structured_model.ainvoke([SystemMessage(content=prompt)])
+    return result.critique
+
+
+async def _advice(state: State, reasons: str) -> EvaluationAdvice:
+    prompt = f"""
+    你是一位專精於「破框思維」的台灣策略顧問，協助用戶把問題陳述補充完整。
+    {_profile_block(state.problem_profile)}
+    各維度評分理由：{reasons}
+    請給出引導用戶改善的建議 (不超過 100 字)，並列出缺少的關鍵資訊欄位。
+    """
+    structured_model = for_state(model_strict, state).with_structured_output(
+        EvaluationAdvice
+    )
+    return await structured_model.ainvoke([SystemMessage(content=prompt)])
+
+
+async def node_evaluation_parallel(state: State) -> Dict[str, Any]:
+    """各維度平行評分，總分與是否通過在本地計算；未通過時才平行生成評語與建議."""
+    logger.info("=== 進入 node_evaluation_parallel ===")
+    scores = await asyncio.gather(
+        *[
+            _score_dimension(state, max_score, rubric)
+            for _, max_score, rubric in DIMENSION_RUBRICS
+        ]
+    )
+    total = sum(result.score for result in scores)
+    is_passing = total >= PASSING_SCORE
+    reasons = "；".join(
+        f"{name} {result.score}/{max_score}：{result.reason}"
+        for (name, max_score, _), result in zip(DIMENSION_RUBRICS, scores)
+    )
+    logger.info(f"Evaluation dimensions: {reasons}")
+
+    if is_passing:
+        critique, advice, missing_fields = reasons, "", []
+    else:
+        critique, advice_result = await asyncio.gather(
+            _critique(state, reasons), _advice(state, reasons)
+        )
+        advice, missing_fields = advice_result.advice, advice_result.missing_fields
+
+    eval_result = {
+        "score": total,
+        "critique": critique,
+        "advice": advice,
+        "missing_fields": missing_fields,
+        "dimensions": {
+            name: result.score for (name, _, _), result in zip(DIMENSION_RUBRICS, scores)
+        },
+    }
+    return _evaluation_update(state, eval_result, is_passing)
@@ -1,13 +1,81 @@
-from langchain_core.messages import SystemMessage
+import uuid
+from typing import Optional
 
-from src.llm import model_with_tools
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.config import config
+from src.intent import NO, YES, intent_classifier
+from src.llm import for_state, model_strict, model_with_tools
 from src.logger import logger
-from src.state import State
+from src.slides import report_to_slides
+from src.state import ExportDecision, State
+
+
+EXPORT_OFFER = "是否要將策略報告製作成 PPT 簡報？"
+EXPORT_DECLINED_REPLY = "好的，不製作簡報。如果之後需要，隨時告訴我。"
+
+
+def _export_offer(state: State) -> Optional[dict]:
+    """剛產生完報告 (還沒問過用戶) 時先詢問，下一輪才判斷用戶的回覆"""
+    if state.last_stage == "file_export" and isinstance(
+        state.messages[-1] if state.messages else None, HumanMessage
+    ):
+        return None
+    logger.info("File export: offering PPT")
+    return {
+        "messages": [AIMessage(content=EXPORT_OFFER)],
+        "node_status": "Asking for file export",
+        "last_stage": "file_export",
+    }
+
+
+def _ppt_tool_call(state: State) -> AIMessage:
+    """直接由報告解析投影片，產生 generate_ppt 的工具呼叫"""
+    slides = report_to_slides(state.final_summary, state.hmw_output)
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "generate_ppt",
+                "args": {
+                    "filename": "strategy_report",
+                    "slides": [slide.model_dump() for slide in slides],
+                },
+                "id": f"call_{uuid.uuid4().hex}",
+            }
+        ],
+    )
+
+
+def _local_export_decision(state: State) -> Optional[AIMessage]:
+    """明確同意或拒絕的簡短回覆在本地判斷，不確定時回傳 None"""
+    if not config.intent_classifier_enabled:
+        return None
+    intent = intent_classifier.decide(
+        "file_export", state.messages[-1].content, (YES, NO)
+    )
+    if intent == YES:
+        return _ppt_tool_call(state)
+    if intent == NO:
+        return AIMessage(content=EXPORT_DECLINED_REPLY)
+    return None
 
 
 async def node_file_export(state: State):
     """將報告輸出為ppt"""
     logger.info("=== 進入 node_file_export ===")
+    offer = _export_offer(state)
+    if offer is not None:
+        return offer
+    msg = _local_export_decision(state)
+    if msg is not None:
+        logger.info(f"File export (local): {msg.content}, {msg.tool_calls}")
+        return {
+            "messages": [msg],
+            "node_status": "Exporting file",
+            "last_stage": "file_export",
+        }
+
     last_message = state.messages[-1]
     prompt = f"""
     你是一位貼心的助理。
@@ -28,3 +96,50 @@ async def node_file_export(state: State):
         "node_status": "Exporting file",
         "last_stage": "file_export",
     }
+
+
+async def node_file_export_deterministic(state: State):
+    """只用模型判斷用戶意願，投影片直接由報告解析，不再重送整份報告"""
+    logger.info("=== 進入 node_file_export_deterministic ===")
+    offer = _export_offer(state)
+    if offer is not None:
+        return offer
+    msg = _local_export_decision(state)
+    if msg is not None:
+        logger.info(f"File export (local): {msg.content}, {msg.tool_calls}")
+        return {
+            "messages": [msg],
+            "node_status": "Exporting file",
+            "last_stage": "file_export",
+        }
+
+    last_message = state.messages[-1]
+    prompt = """
+    你是一位貼心的助理。剛才詢問用戶是否要將策略報告製作成 PPT 簡報。
+    請判斷用戶的回覆是否同意製作 PPT；若不需要或拒絕，請在 reply 禮貌回應並結束對話。
+    """
+    structured_model = for_state(
+        model_strict, state
+    ).with_structured_output(ExportDecision)
+    decision = await structured_model.ainvoke(
+        [SystemMessage(content=prompt), last_message]
+    )
+
+    if decision.wants_ppt:
+        msg = _ppt_tool_call(state)
+    else:
+        msg = AIMessage(content=decision.reply)
+
+    logger.info(f"File export: {msg.content}, Tool calls: {msg.tool_calls}")
+    return {
+        "messages": [msg],
+        "node_status": "Exporting file",
+        "last_stage": "file_export",
+    }
+
+
+async def node_file_export_adaptive(state: State):
+    """降載模式下改用直接解析匯出，否則由模型拆解投影片"""
+    if state.degraded:
+        return await node_file_export_deterministic(state)
+    return await node_file_export(state)
@@ -1,13 +1,74 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
 from langchain_core.messages import SystemMessage, AIMessage
+from langchain_openai import ChatOpenAI
+from langgraph.types import StreamWriter
 
-from src.llm import model
+from src.config import config
+from src.llm import for_state, model
 from src.logger import logger
+from src.session_index import find_similar_sessions, remember_session
 from src.state import State
 
+LADDER_GUIDE = """
+    梯級分析：一個上下顛倒的三角形，頂端是非常廣泛的問題，底端是非常狹隘的問題。
+    在這兩者之間，則有不同的梯度，可以往金字塔的上方或下方走，把問題擴大或縮小，一直嘗試找到適當的範疇。
+    舉例：
+    擬定的問題是「我們如何減少全世界的飢餓問題？」
+    往下走生成提問：「我們如何減少貧困國家的飢餓問題？」
+    甚至更往下走，把問題變成：「我們如何減少富裕國家裡窮人的飢餓問題？」
+"""
+
+# 章節可用的 State 欄位 (prompt 中的名稱 -> 取值)
+SECTION_FIELDS: Dict[str, Callable[[State], Any]] = {
+    "職位": lambda state: state.job_title,
+    "要解決的問題": lambda state: state.hmw_output,
+    "痛點": lambda state: state.problem_profile.get("pain_point"),
+    "目標": lambda state: state.problem_profile.get("goal"),
+    "跨部門視角": lambda state: state.cross_silo_evaluation["result"],
+}
+
+# 可互相獨立生成的章節 (標題, 指示, 使用的欄位)
+INDEPENDENT_SECTIONS = [
+    ("目標", "說明要達成的目標與可量化的成功指標。", ("要解決的問題", "目標")),
+    (
+        "梯形分析：尋找問題甜蜜點",
+        "請用梯級分析，往下生成三個問題。" + LADDER_GUIDE,
+        ("要解決的問題",),
+    ),
+    (
+        "痛點",
+        "具體描述目前的痛點：誰、在什麼情境下、遇到什麼阻礙。",
+        ("職位", "痛點"),
+    ),
+    (
+        "跨部門視角的整合分析",
+        "整合跨部門視角，說明各部門需提供的資源與協作方式。",
+        ("職位", "要解決的問題", "跨部門視角"),
+    ),
+    (
+        "實作步驟",
+        "用編號列出具體且可行的實作步驟。",
+        ("職位", "要解決的問題", "目標", "跨部門視角"),
+    ),
+]
+# 需要其他章節結果才能生成的章節
+CONCLUSION_SECTION = ("結論", "根據上述各章節內容，給出精簡的結論與下一步建議。")
+
+# 章節快取：(模型, 章節, 章節輸入) 的雜湊 -> 章節內容；
+# 只有輸入欄位改變的章節會重新生成
+_section_cache: "OrderedDict[str, str]" = OrderedDict()
+
 
 async def node_final_summary(state: State):
     """產生最終的問題描述總結."""
     logger.info("=== 進入 node_final_summary ===")
+    similar = await find_similar_sessions(state, k=1)
+    draft = similar[0]["final_summary"] if similar else "無"
 
     prompt = f"""
     你是一位策略顧問，請根據以下資訊，產生一個完整且具體的策略報告，幫助用戶聚焦在核心議題上。
@@ -30,11 +91,14 @@ async def node_final_summary(state: State):
     擬定的問題是「我們如何減少全世界的飢餓問題？」
     往下走生成提問：「我們如何減少貧困國家的飢餓問題？」
     甚至更往下走，把問題變成：「我們如何減少富裕國家裡窮人的飢餓問題？」
+
+    過去類似問題的報告草稿 (可沿用結構並依本案調整): {draft}
     """
     
-    msg = await model.ainvoke([SystemMessage(content=prompt)])
+    msg = await for_state(model, state).ainvoke([SystemMessage(content=prompt)])
     logger.info(f"Final summary: {msg.content}")
     response_content = msg.content 
+    await remember_session(state, response_content)
     
     return {
         "messages": [AIMessage(content=response_content)],
@@ -42,3 +106,87 @@ async def node_final_summary(state: State):
         "node_status": "Strategy summary generated.",
         "last_stage": "final_summary",
     }
+
+
+def _section_inputs(state: State, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """章節實際使用的 State 欄位"""
+    return {name: SECTION_FIELDS[name](state) for name in fields}
+
+
+async def _generate_section(
+    llm: ChatOpenAI,
+    inputs: Dict[str, Any],
+    title: str,
+    instruction: str,
+    writer: StreamWriter,
+) -> str:
+    """生成單一章節，輸入未變 (命中快取) 時不呼叫 LLM"""
+    key = hashlib.sha256(
+        json.dumps(
+            [llm.model_name, title, instruction, inputs],
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+    ).hexdigest()
+    if key in _section_cache:
+        _section_cache.move_to_end(key)
+        content = _section_cache[key]
+        logger.info(f"Final summary section cache hit: {title}")
+    else:
+        fields = "".join(f"\n    {name}：{value}" for name, value in inputs.items())
+        prompt = f"""
+    你是一位策略顧問，正在撰寫一份完整且具體的策略報告，幫助用戶聚焦在核心議題上。
+    注意：
+    - 策略要具體且具備可行性，無需多餘的說明或打招呼
+    {fields}
+    現在只撰寫報告中「{title}」這個章節的內文，不要重複章節標題。
+    {instruction}
+    """
+        msg = await llm.ainvoke([SystemMessage(content=prompt)])
+        content = msg.content.strip()
+        _section_cache[key] = content
+        while len(_section_cache) > config.final_summary_cache_size:
+            _section_cache.popitem(last=False)
+
+    section = f"## {title}\n{content}"
+    writer({"final_summary_section": title, "content": section})
+    return section
+
+
+async def node_final_summary_parallel(state: State, writer: StreamWriter):
+    """平行生成各章節後依序組合最終報告."""
+    logger.info("=== 進入 node_final_summary_parallel ===")
+    llm = for_state(model, state)
+
+    header = f"# {state.hmw_output}"
+    writer({"final_summary_section": state.hmw_output, "content": header})
+
+    sections = await asyncio.gather(
+        *[
+            _generate_section(
+                llm, _section_inputs(state, fields), title, instruction, writer
+            )
+            for title, instruction, fields in INDEPENDENT_SECTIONS
+        ]
+    )
+
+    # 結論只依賴其他章節的內容，章節都沒變時也命中快取
+    title, instruction = CONCLUSION_SECTION
+    conclusion_inputs = {
+        **_section_inputs(state, ("要解決的問題",)),
+        "報告其他章節": "\n\n".join(sections),
+    }
+    conclusion = await _generate_section(
+        llm, conclusion_inputs, title, instruction, writer
+    )
+
+    response_content = "\n\n".join([header, *sections, conclusion])
+    logger.info(f"Final summary: {response_content}")
+    await remember_session(state, response_content)
+
+    return {
+        "messages": [AIMessage(content=response_content)],
+        "final_summary": response_content,
+        "node_status": "Strategy summary generated.",
+        "last_stage": "final_summary",
+    }
@@ -1,7 +1,8 @@
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AIMessage, SystemMessage
 
-from src.llm import model
+from src.llm import for_state, model
 from src.logger import logger
+from src.loop_governor import REFINE_LOOP, loop_governor
 from src.state import State
 
 
@@ -25,6 +26,42 @@ async def node_refine_ask(state: State):
     - 問題要精簡，且附上一個舉例幫助理解
     """
     last_message = state.messages[-1]
-    msg = await model.ainvoke([SystemMessage(content=prompt), last_message])
+    msg = await for_state(model, state).ainvoke(
+        [SystemMessage(content=prompt), last_message]
+    )
 
-    return {"messages": [msg], "last_stage": "refine_ask"}
+    # 與先前的追問幾乎相同時不再追問，改走結束路徑
+    if loop_governor.is_repeating(REFINE_LOOP, state.loop_questions, msg.content):
+        return {"escalated_loop": REFINE_LOOP, "last_stage": "refine_ask"}
+
+    loop_counts, loop_questions = loop_governor.record(
+        REFINE_LOOP, state.loop_counts, state.loop_questions, msg.content
+    )
+    return {
+        "messages": [msg],
+        "loop_counts": loop_counts,
+        "loop_questions": loop_questions,
+        "last_stage": "refine_ask",
+    }
+
+
+async def node_refine_escalate(state: State):
+    """追問迴圈達上限或原地打轉時，以分數最高的 profile 繼續往下."""
+    logger.info("=== 進入 node_refine_escalate ===")
+    best = state.best_evaluation or {
+        "score": state.evaluation_result.get("score", 0),
+        "problem_profile": state.problem_profile,
+        "evaluation_result": state.evaluation_result,
+    }
+    content = (
+        f"我們已經來回補充多次，先以目前最完整的問題描述 (評分 {best['score']}/100) "
+        "繼續往下整理。"
+    )
+    return {
+        "messages": [AIMessage(content=content)],
+        "problem_profile": best["problem_profile"],
+        "evaluation_result": best["evaluation_result"],
+        "escalated_loop": None,
+        "node_status": "Refine loop escalated.",
+        "last_stage": "refine_escalate",
+    }
@@ -2,7 +2,7 @@ from typing import Any, Dict
 
 from langchain_core.messages import SystemMessage
 
-from src.llm import model
+from src.llm import for_state, model
 from src.logger import logger
 from src.state import State
 
@@ -27,18 +27,11 @@ async def node_reflection(state: State) -> Dict[str, Any]:
 
     last_message = state.messages[-1]
     messages_to_send = [SystemMessage(content=system_prompt), last_message]
-    msg = await model.ainvoke(messages_to_send)
-
-    # update profile with new info from reflection
-    new_profile = profile.copy()
-    if profile["pain_point"] is not None:
-        new_profile["pain_point"] += msg.content if "pain_point" in missing else ""
-    if profile["goal"] is not None:
-        new_profile["goal"] += msg.content if "goal" in missing else ""
+    msg = await for_state(model, state).ainvoke(messages_to_send)
 
+    # 追問只是問題，不寫進 problem_profile；主管的回答由 situation 萃取
     return {
         "node_status": "output from reflection.",
         "messages": [msg],
         "last_stage": "reflection",
-        "problem_profile": new_profile,
     }
@@ -2,8 +2,9 @@ from typing import Any, Dict
 
 from langchain_core.messages import SystemMessage
 
-from src.llm import model_strict
+from src.llm import for_state, model_strict
 from src.logger import logger
+from src.profile_tracking import append_fragment
 from src.state import ProblemExtraction, State
 
 
@@ -22,25 +23,21 @@ async def node_situation(state: State) -> Dict[str, Any]:
     - 若主管的回答中未提及某項資訊或資訊未變更，請回傳 None。
     - 只有在主管明確想要修改或補充時才更新。
     """
-    structured_model = model_strict.with_structured_output(ProblemExtraction)
+    structured_model = for_state(
+        model_strict, state
+    ).with_structured_output(ProblemExtraction)
     messages = state.messages[-1]
     messages_to_send = [SystemMessage(content=extraction_prompt), messages]
     extracted_data: ProblemExtraction = await structured_model.ainvoke(messages_to_send)
     logger.info(f"extracted data: {extracted_data}")
 
     # update data
+    # 重複的片段不再附加，避免 profile 無意義地變動
     new_profile = current_profile.copy()
-    if new_profile["pain_point"] is not None:
-        if extracted_data.pain_point is not None:
-            new_profile["pain_point"] += "," + extracted_data.pain_point
-    else:
-        new_profile["pain_point"] = extracted_data.pain_point
-
-    if new_profile["goal"] is not None:
-        if extracted_data.goal is not None:
-            new_profile["goal"] += "," + extracted_data.goal
-    else:
-        new_profile["goal"] = extracted_data.goal
+    new_profile["pain_point"] = append_fragment(
+        new_profile["pain_point"], extracted_data.pain_point
+    )
+    new_profile["goal"] = append_fragment(new_profile["goal"], extracted_data.goal)
 
     #  update job title
     if state.job_title is None and extracted_data.job_title is not None:
@@ -0,0 +1,128 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, SystemMessage
+from langgraph.types import StreamWriter
+
+from src.config import config
+from src.llm import for_state, model, model_strict
+from src.logger import logger
+from src.state import LadderQuestions, State
+
+from .cross_silo import (
+    department_perspective,
+    identify_departments,
+    merge_perspectives,
+)
+
+
+def _branch_prefix(state: State) -> str:
+    """所有分支共用的前綴，放在 prompt 開頭以沿用 prompt cache"""
+    return f"""
+    你是一位策略顧問，正在協助主管比較同一個問題在梯級分析中不同範疇的策略。
+    職位：{state.job_title}
+    痛點：{state.problem_profile.get("pain_point")}
+    目標：{state.problem_profile.get("goal")}
+    原本要解決的問題：{state.hmw_output}
+    原本的策略報告：
+    {state.final_summary}
+    """
+
+
+async def _ladder_questions(state: State, prefix: str) -> list[str]:
+    """從報告的梯形分析章節取出往下生成的問題"""
+    prompt = f"""{prefix}
+    請從原本策略報告的「梯形分析」章節，取出往下生成的問題，最多 {config.what_if_max_branches} 個。
+    注意：
+    - 保留原句，不要改寫
+    """
+    structured_model = for_state(model_strict, state).with_structured_output(
+        LadderQuestions
+    )
+    result = await structured_model.ainvoke([SystemMessage(content=prompt)])
+    questions = [q.strip() for q in result.questions if q and q.strip()]
+    return list(dict.fromkeys(questions))[: config.what_if_max_branches]
+
+
+async def _known_departments(state: State) -> list[str]:
+    """沿用先前跨部門討論找出的部門，沒有時重新識別"""
+    departments = [p["department"] for p in state.department_perspectives]
+    if departments:
+        return departments[: config.cross_silo_max_departments]
+    return await identify_departments(state)
+
+
+async def _branch_draft(
+    state: State,
+    prefix: str,
+    departments: list[str],
+    question: str,
+    writer: StreamWriter,
+) -> dict:
+    """單一梯級問題：各部門視角平行生成後，撰寫策略草稿"""
+    branch_state = state.model_copy(update={"hmw_output": question})
+    results = await asyncio.gather(
+        *[department_perspective(branch_state, d) for d in departments],
+        return_exceptions=True,
+    )
+    perspectives = [r for r in results if not isinstance(r, Exception)]
+    cross_silo = merge_perspectives(branch_state, perspectives) if perspectives else "無"
+
+    prompt = f"""{prefix}
+    現在改以範疇較窄的問題「{question}」為核心，撰寫一份精簡的策略草稿。
+    這個問題的跨部門視角：{cross_silo}
+    要有這幾個標題
+    - 目標
+    - 跨部門資源
+    - 實作步驟
+    - 結論
+    注意：
+    - 策略要具體且具備可行性，無需多餘的說明或打招呼
+    - 著重說明與原本報告不同之處
+    """
+    msg = await for_state(model, state).ainvoke([SystemMessage(content=prompt)])
+    draft = msg.content.strip()
+    writer(
+        {"final_summary_section": question, "content": f"### 🪜 {question}\n{draft}"}
+    )
+    return {
+        "question": question,
+        "draft": draft,
+        "department_perspectives": perspectives,
+    }
+
+
+async def node_what_if(state: State, writer: StreamWriter):
+    """梯級分析的每個問題平行生成跨部門視角與策略草稿，供並排比較."""
+    logger.info("=== 進入 node_what_if ===")
+    prefix = _branch_prefix(state)
+
+    questions, departments = await asyncio.gather(
+        _ladder_questions(state, prefix),
+        _known_departments(state),
+    )
+    logger.info(f"What-if questions: {questions}, departments: {departments}")
+
+    results = await asyncio.gather(
+        *[_branch_draft(state, prefix, departments, q, writer) for q in questions],
+        return_exceptions=True,
+    )
+    branches = []
+    for question, result in zip(questions, results):
+        if isinstance(result, Exception):
+            logger.warning(f"What-if branch failed for {question}: {result}")
+            continue
+        branches.append(result)
+
+    if branches:
+        content = f"已針對梯級分析的 {len(branches)} 個問題各產生一份策略草稿，可並排比較："
+    else:
+        content = "目前無法從報告中展開梯級分析的問題，請稍後再試。"
+
+    return {
+        "messages": [
+            AIMessage(content=content, additional_kwargs={"what_if_branches": branches})
+        ],
+        "what_if_requested": False,
+        "node_status": "What-if branches generated.",
+    }
+
@@ -0,0 +1,165 @@
+"""Overload controller that switches sessions into a degraded profile.
+
+監看進行中的 LLM 呼叫數與近期延遲的 p95，超過門檻時新 turn 改走降載設定
+(較便宜的模型、較短 max_tokens、略過 summary、直接解析匯出)，
+低於較低的門檻並維持一段時間後才恢復 (hysteresis)。
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config import config
+from src.logger import logger
+
+# report() 列出最近這麼多個降載 turn 所屬的 session
+RECENT_DEGRADED_TURNS = 50
+
+
+class OverloadController:
+    def __init__(
+        self,
+        enabled: bool,
+        in_flight_high: int,
+        in_flight_low: int,
+        p95_high: float,
+        p95_low: float,
+        window_seconds: float = 60.0,
+        min_dwell_seconds: float = 30.0,
+    ):
+        self.enabled = enabled
+        self.in_flight_high = in_flight_high
+        self.in_flight_low = in_flight_low
+        self.p95_high = p95_high
+        self.p95_low = p95_low
+        self.window_seconds = window_seconds
+        self.min_dwell_seconds = min_dwell_seconds
+
+        self.in_flight = 0
+        self.degraded = False
+        self.degraded_turns = 0
+        # 最近降載的 turn：(session_id, 時間)，舊的自動移出
+        self.recent_degraded: deque = deque(maxlen=RECENT_DEGRADED_TURNS)
+        self._latencies: deque = deque()
+        self._starts: Dict[UUID, float] = {}
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    def call_started(self, run_id: UUID) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self._starts[run_id] = time.monotonic()
+
+    def call_finished(self, run_id: UUID) -> None:
+        now = time.monotonic()
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+            if started is None:
+                return
+            self.in_flight -= 1
+            self._latencies.append((now, now - started))
+
+    def p95(self) -> float:
+        """近期視窗內的 p95 延遲 (秒)"""
+        with self._lock:
+            self._prune(time.monotonic())
+            latencies = sorted(latency for _, latency in self._latencies)
+        if not latencies:
+            return 0.0
+        return latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+
+    def _prune(self, now: float) -> None:
+        while self._latencies and now - self._latencies[0][0] > self.window_seconds:
+            self._latencies.popleft()
+
+    def update(self) -> bool:
+        """依目前負載更新降載狀態，回傳是否處於降載"""
+        if not self.enabled:
+            return False
+        p95 = self.p95()
+        now = time.monotonic()
+        with self._lock:
+            # 狀態切換後至少維持一段時間，避免來回震盪
+            if self._changed_at and now - self._changed_at < self.min_dwell_seconds:
+                return self.degraded
+            overloaded = self.in_flight >= self.in_flight_high or p95 >= self.p95_high
+            recovered = self.in_flight <= self.in_flight_low and p95 <= self.p95_low
+            if not self.degraded and overloaded:
+                self.degraded = True
+                self._changed_at = now
+                logger.warning(
+                    f"Overload: entering degraded mode "
+                    f"(in_flight={self.in_flight}, p95={p95:.1f}s)"
+                )
+            elif self.degraded and recovered:
+                self.degraded = False
+                self._changed_at = now
+                logger.info(
+                    f"Overload: leaving degraded mode "
+                    f"(in_flight={self.in_flight}, p95={p95:.1f}s), "
+                    f"degraded turns so far: {self.degraded_turns}"
+                )
+            return self.degraded
+
+    def profile_for(self, session_id: str) -> bool:
+        """新 turn 開始時決定此 session 是否走降載設定"""
+        degraded = self.update()
+        if degraded:
+            with self._lock:
+                self.degraded_turns += 1
+                self.recent_degraded.append((session_id, time.time()))
+            logger.info(f"Session {session_id[:8]} turn runs degraded")
+        return degraded
+
+    def report(self) -> Dict[str, Any]:
+        """目前負載與最近降載最多的 session [(session_id, 降載 turn 數)]，顯示在 sidebar"""
+        with self._lock:
+            sessions = Counter(session_id for session_id, _ in self.recent_degraded)
+        return {
+            "degraded": self.degraded,
+            "in_flight": self.in_flight,
+            "p95": round(self.p95(), 2),
+            "degraded_turns": self.degraded_turns,
+            "degraded_sessions": sessions.most_common(5),
+        }
+
+
+class LLMLoadTracker(BaseCallbackHandler):
+    """掛在模型上的 callback，回報每次 LLM 呼叫的開始與結束"""
+
+    run_inline = True
+
+    def __init__(self, controller: OverloadController):
+        self.controller = controller
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.controller.call_started(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self.controller.call_started(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self.controller.call_finished(run_id)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.controller.call_finished(run_id)
+
+
+overload_controller = OverloadController(
+    enabled=config.overload_enabled,
+    in_flight_high=config.overload_in_flight_high,
+    in_flight_low=config.overload_in_flight_low,
+    p95_high=config.overload_p95_high,
+    p95_low=config.overload_p95_low,
+)
+load_tracker: Optional[LLMLoadTracker] = (
+    LLMLoadTracker(overload_controller) if config.overload_enabled else None
+)
@@ -0,0 +1,82 @@
+"""Field-level change tracking for problem_profile.
+
+- append_fragment：附加新片段前先正規化比對，重複的內容不再附加
+- field_hashes / changed_fields：以內容雜湊記錄上次評估時的 profile，判斷哪些欄位有變動
+- profile 未變動時可沿用上次的 evaluation_result，略過 summary 與 evaluation
+"""
+
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional
+
+from src.logger import logger
+
+_SEPARATOR_RE = re.compile(r"[,，、;；。\n]+")
+_NOISE_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize(text: Optional[str]) -> str:
+    """去除空白與標點並轉小寫，用於比對內容是否相同"""
+    return _NOISE_RE.sub("", (text or "").lower())
+
+
+def append_fragment(existing: Optional[str], fragment: Optional[str]) -> Optional[str]:
+    """以 "," 附加片段；片段為空或與原內容的某一段完全相同時不附加
+
+    以整段正規化後的內容比對，「流失」不會因為原內容有「客戶流失率15%」而被丟掉。
+    """
+    if not fragment or not normalize(fragment):
+        return existing
+    if not existing:
+        return fragment
+    seen = {normalize(part) for part in _SEPARATOR_RE.split(existing)}
+    new_parts = []
+    for part in _SEPARATOR_RE.split(fragment):
+        key = normalize(part)
+        if key and key not in seen:
+            seen.add(key)
+            new_parts.append(part)
+    if not new_parts:
+        return existing
+    return existing + "," + ",".join(part.strip() for part in new_parts)
+
+
+def field_hashes(profile: dict) -> Dict[str, str]:
+    """每個欄位正規化後內容的雜湊"""
+    return {
+        field: hashlib.sha1(normalize(value).encode("utf-8")).hexdigest()
+        for field, value in profile.items()
+    }
+
+
+def changed_fields(profile: dict, hashes: Dict[str, str]) -> List[str]:
+    """與上次評估時相比有變動的欄位"""
+    current = field_hashes(profile)
+    return [field for field, h in current.items() if hashes.get(field) != h]
+
+
+class SkipCounter:
+    """統計 summary/evaluation 被略過的比例"""
+
+    def __init__(self):
+        self.checks = 0
+        self.skips = 0
+        self._lock = threading.Lock()
+
+    def record(self, skipped: bool) -> None:
+        with self._lock:
+            self.checks += 1
+            self.skips += int(skipped)
+            rate = self.skips / self.checks
+        logger.info(
+            f"Profile unchanged skip: {skipped} (skip rate {rate:.0%}, "
+            f"{self.skips}/{self.checks})"
+        )
+
+    @property
+    def rate(self) -> float:
+        return self.skips / self.checks if self.checks else 0.0
+
+
+evaluation_skips = SkipCounter()
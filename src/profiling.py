@@ -0,0 +1,274 @@
+"""Opt-in per-turn profiler writing speedscope-compatible files.
+
+啟用後 (PROFILE_TURNS=true 或 sidebar 開關)，每一輪對話會：
+- 以背景執行緒對事件迴圈所在的執行緒做 wall-time 取樣
+- 記錄這一輪建立的每個 asyncio task 的執行時間
+- 以 tracemalloc 追蹤記憶體配置
+並輸出 profiles/<時間>_<session>_<節點路徑>.speedscope.json 與對應的 .summary.json。
+未啟用時只多一次布林判斷。
+
+事件迴圈由所有 session 共用，因此：
+- 同一時間只允許一個 profiler，其他 turn 要求 profiling 時略過
+- 只記錄這一輪的 task (bind() 之後建立的 task 繼承 context) 與其執行時的 stack；
+  迴圈閒置 (等待 I/O) 的時間記在 "(idle: awaiting I/O)"，其他 session 執行的時間略過
+- tracemalloc 以參考計數啟停，不會停掉其他使用者開啟的追蹤
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakSet
+
+from src.config import config
+from src.logger import logger
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+# 事件迴圈沒有 task 在執行 (等待網路等 I/O) 時記在這個虛擬 stack
+IDLE_STACK = (("(idle: awaiting I/O)", "", 0),)
+
+# 目前 task 所屬的 profiler；子 task 建立時複製 context 而繼承
+_current_profiler: contextvars.ContextVar = contextvars.ContextVar(
+    "current_profiler", default=None
+)
+# 整個 process 同時只有一個 profiler 在執行
+_active_lock = threading.Lock()
+_active: Optional["TurnProfiler"] = None
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    """最後一個使用者釋放時才停止，且只停止自己開啟的追蹤"""
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class _StackSampler(threading.Thread):
+    """定期擷取目標執行緒的 call stack"""
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float,
+        loop: asyncio.AbstractEventLoop,
+        tasks: WeakSet,
+    ):
+        super().__init__(daemon=True, name="turn-profiler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.loop = loop
+        self.tasks = tasks
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            task = asyncio.current_task(self.loop)
+            if task is None:
+                # 迴圈閒置表示在等 I/O，仍計入 wall time 才能與 CPU 時間區分
+                self.samples[IDLE_STACK] += now - last
+                last = now
+                continue
+            # 其他 session 的 task 正在執行時略過
+            if task not in self.tasks:
+                last = now
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[Tuple[str, str, int]] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                # 以實際經過時間當權重，避免取樣延遲造成偏差
+                self.samples[tuple(reversed(stack))] += now - last
+            last = now
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class TurnProfiler:
+    """對單一 turn 做 profiling，stop() 時寫出檔案"""
+
+    def __init__(self, session_id: str, out_dir: str = None, interval: float = None):
+        self.session_id = session_id
+        self.out_dir = out_dir or config.profile_dir
+        self.interval = interval or config.profile_interval
+        self.task_timings: List[Dict] = []
+        self._tasks: WeakSet = WeakSet()
+        self._sampler: Optional[_StackSampler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._previous_factory = None
+        self._started_at = 0.0
+
+    def start(
+        self, loop: asyncio.AbstractEventLoop, thread_id: Optional[int] = None
+    ) -> bool:
+        """開始 profiling；thread_id 為執行事件迴圈的執行緒，預設為目前執行緒
+
+        已有其他 profiler 在執行時不啟動並回傳 False。
+        """
+        global _active
+        with _active_lock:
+            if _active is not None:
+                logger.info(
+                    f"Profiling skipped for session {self.session_id[:8]}: "
+                    f"session {_active.session_id[:8]} is being profiled"
+                )
+                return False
+            _active = self
+        self._started_at = time.perf_counter()
+        _acquire_tracemalloc()
+        self._loop = loop
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+        self._sampler = _StackSampler(
+            thread_id or threading.get_ident(), self.interval, loop, self._tasks
+        )
+        self._sampler.start()
+        return True
+
+    def bind(self) -> None:
+        """在這一輪的根 task 中呼叫；之後建立的子 task 都歸屬這個 profiler"""
+        _current_profiler.set(self)
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.add(task)
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context") or contextvars.copy_context()
+        if context.get(_current_profiler) is not self:
+            return task
+        self._tasks.add(task)
+        created = time.perf_counter()
+        name = getattr(coro, "__qualname__", task.get_name())
+
+        def _done(t: asyncio.Task) -> None:
+            self.task_timings.append(
+                {
+                    "task": name,
+                    "start": round(created - self._started_at, 6),
+                    "duration": round(time.perf_counter() - created, 6),
+                    "cancelled": t.cancelled(),
+                }
+            )
+
+        task.add_done_callback(_done)
+        return task
+
+    def stop(self, node_path: List[str]) -> Optional[str]:
+        """停止取樣並寫出檔案，回傳 speedscope 檔案路徑"""
+        global _active
+        if self._sampler is None:
+            return None
+        elapsed = time.perf_counter() - self._started_at
+        self._sampler.stop()
+        # 釋放 _active 之前還原，下一個 profiler 才會以原本的 factory 為基礎
+        self._loop.set_task_factory(self._previous_factory)
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            _release_tracemalloc()
+            with _active_lock:
+                _active = None
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        tag = "-".join(node_path) or "empty"
+        base = os.path.join(
+            self.out_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}_{self.session_id[:8]}_{tag}",
+        )
+        name = f"session {self.session_id[:8]}: {' → '.join(node_path)}"
+        with open(f"{base}.speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(self._speedscope(name, elapsed), f, ensure_ascii=False)
+
+        allocations = [
+            {"location": str(stat.traceback), "size": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:30]
+        ]
+        summary = {
+            "session_id": self.session_id,
+            "node_path": node_path,
+            "elapsed": round(elapsed, 6),
+            "memory_current": current,
+            "memory_peak": peak,
+            "tasks": sorted(self.task_timings, key=lambda t: t["start"]),
+            "top_allocations": allocations,
+        }
+        with open(f"{base}.summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"Turn profile written to {base}.speedscope.json ({elapsed:.2f}s)")
+        return f"{base}.speedscope.json"
+
+    def _speedscope(self, name: str, elapsed: float) -> Dict:
+        frames: List[Dict] = []
+        frame_index: Dict[Tuple[str, str, int], int] = {}
+        samples, weights = [], []
+        for stack, weight in self._sampler.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append(
+                        {"name": frame[0], "file": frame[1], "line": frame[2]}
+                    )
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(weight)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "co-think-agent",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": elapsed,
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def profiler_for_turn(
+    session_id: str, requested: bool = False
+) -> Optional[TurnProfiler]:
+    """環境變數或 UI 要求時才建立 profiler，否則回傳 None"""
+    if not (requested or config.profile_turns):
+        return None
+    return TurnProfiler(session_id)
@@ -0,0 +1,210 @@
+"""Rerun a node (or the subgraph downstream of it) from stored snapshots.
+
+從 src.snapshots 記錄的節點輸入重跑，不必重新點完整段對話、也不必再付上游 LLM 呼叫：
+- 預設只重跑指定節點；--downstream 從該節點開始跑到該輪結束
+- 多筆快照 (整個 session 語料) 以 --concurrency 平行重跑
+- 逐筆比較輸出與延遲，--diff 顯示內容差異
+
+重跑時節點照常執行，會寫入 session index 與 artifact store；
+不想影響正式資料時，請將 SESSION_STORE_PATH / ARTIFACT_DIR 指向暫存目錄。
+
+Usage:
+    uv run python -m src.replay final_summary --limit 20
+    uv run python -m src.replay evaluation --downstream --concurrency 8 --diff
+"""
+
+import argparse
+import asyncio
+import difflib
+import json
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.config import config
+from src.graph import build_workflow
+from src.snapshots import NodeSnapshot, SnapshotStore, decode_state, encode_state
+from src.state import State
+
+# 每次執行都不同的欄位，比較時忽略
+_VOLATILE_MESSAGE_KEYS = ("id", "response_metadata", "usage_metadata")
+
+
+@dataclass
+class ReplayResult:
+    snapshot: NodeSnapshot
+    original: Dict[str, Any]
+    original_duration: float
+    replayed: Dict[str, Any]
+    replayed_duration: float
+    error: Optional[str] = None
+
+    @property
+    def changed(self) -> List[str]:
+        keys = sorted(set(self.original) | set(self.replayed))
+        return [
+            key
+            for key in keys
+            if _comparable(self.original.get(key))
+            != _comparable(self.replayed.get(key))
+        ]
+
+
+def _comparable(value: Any) -> str:
+    """去除每次執行都會變的欄位後的 JSON 字串"""
+    if isinstance(value, list):
+        value = [
+            {
+                **item,
+                "data": {
+                    k: v
+                    for k, v in item.get("data", {}).items()
+                    if k not in _VOLATILE_MESSAGE_KEYS
+                },
+            }
+            if isinstance(item, dict) and "data" in item
+            else item
+            for item in value
+        ]
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _text(value: Any) -> List[str]:
+    """差異比對用的文字：訊息取內容，其他欄位取 JSON"""
+    if isinstance(value, list) and all(
+        isinstance(item, dict) and "data" in item for item in value
+    ):
+        content = "\n".join(str(item["data"].get("content", "")) for item in value)
+        return content.split("\n")
+    return json.dumps(value, ensure_ascii=False, indent=2, default=str).split("\n")
+
+
+def merge_updates(updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """依序合併多個節點的更新；messages 串接，其他欄位以後者為準"""
+    merged: Dict[str, Any] = {}
+    for update in updates:
+        for key, value in update.items():
+            if key == "messages":
+                merged[key] = merged.get(key, []) + value
+            else:
+                merged[key] = value
+    return merged
+
+
+async def replay_snapshot(
+    graph: Any, snapshot: NodeSnapshot, downstream: bool
+) -> Dict[str, Any]:
+    """從快照的輸入重跑，回傳 (編碼後的) 合併更新"""
+    state = State(**decode_state(snapshot.input))
+    updates = []
+    async for chunk in graph.astream(
+        state,
+        stream_mode="updates",
+        config={"configurable": {"session_id": snapshot.session_id}},
+    ):
+        updates.extend(encode_state(update) for update in chunk.values())
+        if not downstream:
+            break
+    return merge_updates(updates)
+
+
+async def replay_all(
+    store: SnapshotStore,
+    snapshots: List[NodeSnapshot],
+    downstream: bool,
+    concurrency: int,
+) -> List[ReplayResult]:
+    graph = build_workflow(entry=snapshots[0].node).compile()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def replay(snapshot: NodeSnapshot) -> ReplayResult:
+        if downstream:
+            originals = store.turn(snapshot.turn_id, snapshot.step)
+        else:
+            originals = [snapshot]
+        result = ReplayResult(
+            snapshot=snapshot,
+            original=merge_updates([s.output for s in originals]),
+            original_duration=sum(s.duration for s in originals),
+            replayed={},
+            replayed_duration=0.0,
+        )
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result.replayed = await replay_snapshot(graph, snapshot, downstream)
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+            result.replayed_duration = time.perf_counter() - start
+        return result
+
+    return await asyncio.gather(*[replay(s) for s in snapshots])
+
+
+def report(results: List[ReplayResult], show_diff: bool) -> None:
+    for r in results:
+        s = r.snapshot
+        status = r.error or (", ".join(r.changed) if r.changed else "unchanged")
+        print(
+            f"{s.session_id[:8]} {s.turn_id[:8]} step {s.step:>2} | "
+            f"{r.original_duration * 1000:8.0f}ms -> "
+            f"{r.replayed_duration * 1000:8.0f}ms | {status}"
+        )
+        if show_diff and not r.error:
+            for key in r.changed:
+                print(
+                    "\n".join(
+                        difflib.unified_diff(
+                            _text(r.original.get(key)),
+                            _text(r.replayed.get(key)),
+                            fromfile=f"original/{key}",
+                            tofile=f"replay/{key}",
+                            lineterm="",
+                        )
+                    )
+                )
+
+    ok = [r for r in results if not r.error]
+    if not ok:
+        return
+    changed = sum(1 for r in ok if r.changed)
+    original = statistics.median(r.original_duration for r in ok) * 1000
+    replayed = statistics.median(r.replayed_duration for r in ok) * 1000
+    print(
+        f"{len(results)} replayed, {changed} changed, "
+        f"{len(results) - len(ok)} failed | "
+        f"p50 {original:.0f}ms -> {replayed:.0f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("node", help="graph node to replay, e.g. final_summary")
+    parser.add_argument(
+        "--downstream",
+        action="store_true",
+        help="run from the node to the end of the turn instead of the node alone",
+    )
+    parser.add_argument("--session", help="only snapshots of this session id")
+    parser.add_argument("--limit", type=int, help="most recent N snapshots")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--diff", action="store_true", help="show output diffs")
+    parser.add_argument("--db", default=config.snapshot_db_path)
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.db)
+    snapshots = store.query(args.node, args.session, args.limit)
+    if not snapshots:
+        print(f"no snapshots of {args.node} in {args.db}")
+        return
+    results = asyncio.run(
+        replay_all(store, snapshots, args.downstream, args.concurrency)
+    )
+    report(results, args.diff)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Long-lived background event loop shared by all sessions.
+
+Streamlit 的每次 script run 只把 turn 交給這個迴圈執行 (thread-safe future)，
+所以不同 session 的 LLM 等待可以真正重疊，模型的 HTTP 連線也能跨 rerun 重複使用。
+compiled graph 與 LLM client 都只在這個迴圈上使用。
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+from src.logger import logger
+
+
+class BackgroundLoop:
+    def __init__(self, name: str = "agent-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        logger.info("Background event loop started")
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """從任意執行緒提交 coroutine，回傳 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+_runtime: Optional[BackgroundLoop] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> BackgroundLoop:
+    """整個 process 共用一個背景事件迴圈"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = BackgroundLoop()
+    return _runtime
@@ -0,0 +1,260 @@
+"""Local store and similarity index over completed strategy sessions.
+
+完成的 session（職位、痛點、目標、HMW、跨部門視角、最終報告）會寫入本地 JSONL，
+並以字元 n-gram TF-IDF 建立倒排索引，讓新的 session 可以找到相似問題的草稿作為參考。
+- 記憶體中只保留索引與每筆紀錄在檔案中的位置，命中時才從檔案讀出完整紀錄
+- 載入、搜尋與寫入都在 worker thread 執行，不會卡住共用的事件迴圈
+- 啟動時以 preload_session_store() 在背景建立索引
+"""
+
+import asyncio
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.config import config
+from src.logger import logger
+
+NGRAM_SIZES = (1, 2)
+# 出現在超過此比例文件中的 n-gram 幾乎沒有鑑別力，查詢時略過
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def char_ngrams(text: str) -> Counter:
+    """將文字切成字元 n-gram，中文不需斷詞"""
+    grams: Counter = Counter()
+    for segment in _NON_WORD_RE.split((text or "").lower()):
+        for n in NGRAM_SIZES:
+            for i in range(len(segment) - n + 1):
+                grams[segment[i : i + n]] += 1
+    return grams
+
+
+def session_text(record: dict) -> str:
+    """用來建立索引的文字：只取問題描述，不含冗長的報告"""
+    profile = record.get("problem_profile") or {}
+    return " ".join(
+        str(part)
+        for part in (
+            record.get("job_title"),
+            profile.get("pain_point"),
+            profile.get("goal"),
+            record.get("hmw_output"),
+        )
+        if part
+    )
+
+
+class SessionIndex:
+    """字元 n-gram TF-IDF 倒排索引.
+
+    文件權重使用 (1 + log tf) / sqrt(文件長度)，IDF 於查詢時計算，
+    因此新增文件不需要重算既有文件的權重。
+    """
+
+    def __init__(self):
+        # doc_id -> 呼叫端給的參照 (例如紀錄在檔案中的位置)
+        self.refs = array("q")
+        self._doc_ids: Dict[str, array] = defaultdict(lambda: array("I"))
+        self._weights: Dict[str, array] = defaultdict(lambda: array("f"))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def add(self, record: dict, ref: int) -> None:
+        grams = char_ngrams(session_text(record))
+        if not grams:
+            return
+        length = math.sqrt(sum(grams.values()))
+        with self._lock:
+            doc_id = len(self.refs)
+            self.refs.append(ref)
+            for gram, tf in grams.items():
+                self._doc_ids[gram].append(doc_id)
+                self._weights[gram].append((1 + math.log(tf)) / length)
+
+    def search(
+        self, text: str, k: int = 3, min_score: float = 0.0
+    ) -> List[Tuple[float, int]]:
+        """回傳最相似的 k 筆 (score, ref)"""
+        grams = char_ngrams(text)
+        if not grams:
+            return []
+
+        # 掃描 postings 時持有鎖，避免同時寫入的 add() 讓 doc_id 超出 scores
+        with self._lock:
+            total = len(self.refs)
+            if total == 0:
+                return []
+            # 以 list 累加分數，比 dict 快很多
+            scores = [0.0] * total
+            query_norm = 0.0
+            for gram, tf in grams.items():
+                doc_ids = self._doc_ids.get(gram, ())
+                idf = math.log((1 + total) / (1 + len(doc_ids))) + 1
+                query_weight = (1 + math.log(tf)) * idf
+                query_norm += query_weight * query_weight
+                too_common = (
+                    total > 2 and len(doc_ids) > MAX_DOCUMENT_FREQUENCY * total
+                )
+                if not doc_ids or too_common:
+                    continue
+                factor = query_weight * idf
+                for doc_id, weight in zip(doc_ids, self._weights[gram]):
+                    scores[doc_id] += factor * weight
+
+        norm = math.sqrt(query_norm) or 1.0
+        best = heapq.nlargest(
+            k,
+            ((doc_id, score) for doc_id, score in enumerate(scores) if score),
+            key=lambda item: item[1],
+        )
+        return [
+            (score / norm, self.refs[doc_id])
+            for doc_id, score in best
+            if score / norm >= min_score
+        ]
+
+
+class SessionStore:
+    """JSONL 持久化的 session 儲存，啟動時載入並建立索引"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index = SessionIndex()
+        self._write_lock = threading.Lock()
+        if os.path.exists(path):
+            start = time.perf_counter()
+            offset = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        self.index.add(json.loads(line), offset)
+                    offset += len(line)
+            logger.info(
+                f"Loaded {len(self.index)} sessions into index in "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+
+    def add(self, record: dict) -> dict:
+        record = {"session_id": uuid.uuid4().hex, "created_at": time.time(), **record}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._write_lock:
+            with open(self.path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+            self.index.add(record, offset)
+        return record
+
+    def read(self, offset: int) -> dict:
+        """從檔案讀出位於 offset 的紀錄"""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def search(
+        self, text: str, k: int = 3, min_score: float = 0.0
+    ) -> List[Tuple[float, dict]]:
+        return [
+            (score, self.read(offset))
+            for score, offset in self.index.search(text, k=k, min_score=min_score)
+        ]
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """取得共用的 session store；未啟用時回傳 None
+
+    第一次呼叫會載入整個 JSONL，請在 worker thread 中呼叫。
+    """
+    global _store
+    if not config.session_index_enabled:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(config.session_store_path)
+    return _store
+
+
+_preload_started = False
+
+
+def preload_session_store() -> None:
+    """在背景執行緒建立索引，第一個 session 不必等待載入"""
+    global _preload_started
+    with _store_lock:
+        if not config.session_index_enabled or _preload_started or _store:
+            return
+        _preload_started = True
+    threading.Thread(
+        target=get_session_store, daemon=True, name="session-index-load"
+    ).start()
+
+
+def _remember(record: dict) -> None:
+    store = get_session_store()
+    if store is None:
+        return
+    try:
+        store.add(record)
+    except OSError as e:
+        logger.warning(f"Failed to persist session: {e}")
+
+
+async def remember_session(state, final_summary: str) -> None:
+    """將完成的 session 寫入 store"""
+    if not config.session_index_enabled:
+        return
+    record = {
+        "job_title": state.job_title,
+        "problem_profile": state.problem_profile,
+        "hmw_output": state.hmw_output,
+        "cross_silo_result": state.cross_silo_evaluation.get("result", ""),
+        "final_summary": final_summary,
+    }
+    await asyncio.to_thread(_remember, record)
+
+
+def _search(query: str, k: int) -> List[Tuple[float, dict]]:
+    store = get_session_store()
+    if store is None:
+        return []
+    try:
+        return store.search(query, k=k, min_score=config.session_index_min_score)
+    except Exception as e:
+        # 參考草稿只是輔助，找不到時照常產生
+        logger.warning(f"Similar session search failed: {e}")
+        return []
+
+
+async def find_similar_sessions(state, k: int = None) -> List[dict]:
+    """找出與目前問題相似的過去 session"""
+    if not config.session_index_enabled:
+        return []
+    query = session_text(
+        {
+            "job_title": state.job_title,
+            "problem_profile": state.problem_profile,
+            "hmw_output": state.hmw_output,
+        }
+    )
+    results = await asyncio.to_thread(
+        _search, query, k or config.session_index_top_k
+    )
+    logger.info(f"Similar sessions: {[round(score, 3) for score, _ in results]}")
+    return [record for _, record in results]
@@ -0,0 +1,112 @@
+"""Deterministic conversion of the markdown strategy report into slides."""
+
+import re
+from typing import List, Optional
+
+from src.tool import SlideContent
+
+MAX_ITEMS_PER_SLIDE = 6
+MAX_CHARS_PER_SLIDE = 360
+CONTINUED_SUFFIX = "（續）"
+OVERVIEW_HEADER = "概述"
+
+_HEADING_RE = re.compile(r"^\s*#{1,6}\s+(.*)$")
+# 只有獨立一行的粗體視為標題；「1. **成立小組**：」是目前章節的編號項目
+_BOLD_LINE_RE = re.compile(r"^\s*\*\*(.+?)\*\*\s*[:：]?\s*$")
+_BULLET_RE = re.compile(r"^\s*[-*+•]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^\s*(\d+)\s*[.、)]\s+(.*)$")
+_RULE_RE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+
+
+def _clean(text: str) -> str:
+    """移除行內 markdown 標記"""
+    text = re.sub(r"\*\*(.+?)\*\*", r"\1", text)
+    text = re.sub(r"__(.+?)__", r"\1", text)
+    text = re.sub(r"`([^`]*)`", r"\1", text)
+    return text.strip().rstrip("：:").strip()
+
+
+class SlideBuilder:
+    """逐行解析報告並累積投影片，可在報告串流時持續 feed."""
+
+    def __init__(self, title: str, subtitle: Optional[str] = None):
+        self.title = _clean(title or "")
+        self._slides: List[SlideContent] = [
+            SlideContent(header=self.title, items=[subtitle] if subtitle else [])
+        ]
+        self._header: Optional[str] = None
+        self._items: List[str] = []
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> None:
+        """加入一段文字，只處理已完整的行"""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._parse_line(line)
+
+    def finish(self) -> List[SlideContent]:
+        """處理剩餘文字並回傳所有投影片"""
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = ""
+        self._flush()
+        return list(self._slides)
+
+    def _parse_line(self, line: str) -> None:
+        if not line.strip() or _RULE_RE.match(line):
+            return
+
+        heading = _HEADING_RE.match(line) or _BOLD_LINE_RE.match(line)
+        if heading:
+            header = _clean(heading.group(1))
+            # 報告開頭的 HMW 標題已經是首頁
+            if header == self.title and not self._slides[1:] and not self._items:
+                return
+            self._flush()
+            self._header = header
+            return
+
+        numbered = _NUMBERED_RE.match(line)
+        bullet = _BULLET_RE.match(line)
+        if numbered:
+            item = f"{numbered.group(1)}. {_clean(numbered.group(2))}"
+        elif bullet:
+            item = _clean(bullet.group(1))
+        else:
+            item = _clean(line)
+        if item:
+            self._items.append(item)
+
+    def _flush(self) -> None:
+        """將目前章節切成一或多頁投影片"""
+        if not self._items:
+            return
+        header = self._header or OVERVIEW_HEADER
+        page: List[str] = []
+        chars = 0
+        for item in self._items:
+            if page and (
+                len(page) >= MAX_ITEMS_PER_SLIDE
+                or chars + len(item) > MAX_CHARS_PER_SLIDE
+            ):
+                self._add_page(header, page)
+                page, chars = [], 0
+            page.append(item)
+            chars += len(item)
+        self._add_page(header, page)
+        self._items = []
+
+    def _add_page(self, header: str, items: List[str]) -> None:
+        if self._slides[-1].header in (header, header + CONTINUED_SUFFIX):
+            header = header + CONTINUED_SUFFIX
+        self._slides.append(SlideContent(header=header, items=items))
+
+
+def report_to_slides(
+    report: str, title: str, subtitle: Optional[str] = None
+) -> List[SlideContent]:
+    """將 markdown 策略報告轉為投影片列表，第一頁為標題首頁."""
+    builder = SlideBuilder(title, subtitle)
+    builder.feed(report or "")
+    return builder.finish()
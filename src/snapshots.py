@@ -0,0 +1,299 @@
+"""Per-node input / output snapshots of each turn, stored in local SQLite.
+
+以 LangChain callback 取得每個 graph 節點的輸入 State 與輸出的更新 (delta)：
+- 每一輪由 snapshots_for_turn 建立一個 recorder，整輪結束時交給背景的寫入執行緒，
+  在一個交易中寫入，不會卡住共用的事件迴圈
+- 輸入與輸出以 JSON 序列化後 zlib 壓縮，一列一個節點
+- `python -m src.replay` 可從快照重跑單一節點或下游子圖，比較輸出與延遲
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from pydantic import BaseModel
+
+from src.config import config
+from src.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    turn_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    input BLOB NOT NULL,
+    output BLOB NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_node ON snapshots (node, started_at);
+CREATE INDEX IF NOT EXISTS snapshots_turn ON snapshots (turn_id, step);
+"""
+
+
+def encode_state(value: Any) -> Dict[str, Any]:
+    """State 或節點回傳的更新轉成可序列化的 dict"""
+    if isinstance(value, BaseModel):
+        data = {name: getattr(value, name) for name in type(value).model_fields}
+    elif isinstance(value, dict):
+        data = dict(value)
+    else:
+        # 例如節點沒有回傳更新
+        return {} if value is None else {"value": str(value)}
+    if data.get("messages"):
+        data["messages"] = messages_to_dict(data["messages"])
+    return data
+
+
+def decode_state(data: Dict[str, Any]) -> Dict[str, Any]:
+    """encode_state 的反向；回傳的 dict 可直接建立 State"""
+    data = dict(data)
+    if "messages" in data:
+        data["messages"] = messages_from_dict(data["messages"])
+    return data
+
+
+def _pack(data: Dict[str, Any]) -> bytes:
+    return zlib.compress(
+        json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+    )
+
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+@dataclass
+class NodeSnapshot:
+    session_id: str
+    turn_id: str
+    step: int
+    node: str
+    started_at: float
+    input: Dict[str, Any]
+    output: Dict[str, Any] = field(default_factory=dict)
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+class SnapshotStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._pending: "queue.Queue[List[NodeSnapshot]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                conn.close()
+                self._initialized = True
+        return sqlite3.connect(self.path)
+
+    def write(self, snapshots: List[NodeSnapshot]) -> None:
+        if not snapshots:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO snapshots (session_id, turn_id, step, node, "
+                    "started_at, duration, input, output, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            s.session_id,
+                            s.turn_id,
+                            s.step,
+                            s.node,
+                            s.started_at,
+                            s.duration,
+                            _pack(s.input),
+                            _pack(s.output),
+                            s.error,
+                        )
+                        for s in snapshots
+                    ],
+                )
+        finally:
+            conn.close()
+
+    def submit(self, snapshots: List[NodeSnapshot]) -> None:
+        """交給背景執行緒寫入，呼叫端不必等待 SQLite"""
+        if not snapshots:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_pending, daemon=True, name="snapshot-writer"
+                )
+                self._writer.start()
+        self._pending.put(snapshots)
+
+    def _write_pending(self) -> None:
+        while True:
+            snapshots = self._pending.get()
+            try:
+                self.write(snapshots)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write node snapshots: {e}")
+            finally:
+                self._pending.task_done()
+
+    def flush(self) -> None:
+        """等待已交出的快照寫完"""
+        self._pending.join()
+
+    def _select(
+        self, where: str, params: tuple, suffix: str = ""
+    ) -> List[NodeSnapshot]:
+        if not os.path.exists(self.path):
+            return []
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT session_id, turn_id, step, node, started_at, duration, "
+                f"input, output, error FROM snapshots WHERE {where} {suffix}",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            NodeSnapshot(
+                session_id=session_id,
+                turn_id=turn_id,
+                step=step,
+                node=node,
+                started_at=started_at,
+                duration=duration,
+                input=_unpack(input_blob),
+                output=_unpack(output_blob),
+                error=error,
+            )
+            for (
+                session_id,
+                turn_id,
+                step,
+                node,
+                started_at,
+                duration,
+                input_blob,
+                output_blob,
+                error,
+            ) in rows
+        ]
+
+    def query(
+        self,
+        node: str,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[NodeSnapshot]:
+        """某個節點成功執行的快照，新的在前"""
+        where = "node = ? AND error IS NULL"
+        params: tuple = (node,)
+        if session_id:
+            where += " AND session_id = ?"
+            params += (session_id,)
+        suffix = "ORDER BY started_at DESC"
+        if limit:
+            suffix += f" LIMIT {int(limit)}"
+        return self._select(where, params, suffix)
+
+    def turn(self, turn_id: str, from_step: int = 0) -> List[NodeSnapshot]:
+        """同一輪中 from_step 之後 (含) 的節點，依執行順序"""
+        return self._select(
+            "turn_id = ? AND step >= ?", (turn_id, from_step), "ORDER BY step, id"
+        )
+
+
+class SnapshotRecorder(BaseCallbackHandler):
+    """記錄一輪中每個節點的輸入與輸出，整輪結束時寫入 store"""
+
+    run_inline = True
+
+    def __init__(self, store: SnapshotStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.turn_id = uuid.uuid4().hex
+        self._root: Optional[UUID] = None
+        # run_id -> (快照, perf_counter 起點)；duration 以 monotonic 時鐘計算
+        self._open: Dict[UUID, Tuple[NodeSnapshot, float]] = {}
+        self._done: List[NodeSnapshot] = []
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        node = metadata.get("langgraph_node")
+        if parent_run_id is None:
+            self._root = run_id
+        elif node and name == node:
+            snapshot = NodeSnapshot(
+                session_id=self.session_id,
+                turn_id=self.turn_id,
+                step=metadata.get("langgraph_step") or 0,
+                node=node,
+                started_at=time.time(),
+                input=encode_state(inputs),
+            )
+            self._open[run_id] = (snapshot, time.perf_counter())
+
+    def _finish(
+        self, run_id: UUID, outputs: Any = None, error: Optional[BaseException] = None
+    ) -> None:
+        opened = self._open.pop(run_id, None)
+        if opened is not None:
+            snapshot, start = opened
+            snapshot.duration = round(time.perf_counter() - start, 6)
+            snapshot.output = encode_state(outputs)
+            if error is not None:
+                snapshot.error = f"{type(error).__name__}: {error}"
+            self._done.append(snapshot)
+        if run_id == self._root:
+            done, self._done = self._done, []
+            self.store.submit(done)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, outputs)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._finish(run_id, error=error)
+
+
+snapshot_store = SnapshotStore(config.snapshot_db_path)
+
+
+def snapshots_for_turn(session_id: str) -> Optional[SnapshotRecorder]:
+    """啟用快照時回傳這一輪的 recorder，否則回傳 None"""
+    if not config.snapshot_enabled:
+        return None
+    return SnapshotRecorder(snapshot_store, session_id)
@@ -26,12 +26,49 @@ class ProblemEvaluation(BaseModel):
     missing_fields: list[str] = Field(..., description="缺少的關鍵資訊欄位")
 
 
+class DimensionScore(BaseModel):
+    score: int = Field(..., description="此維度的分數")
+    reason: str = Field(..., description="一句話說明給分理由")
+
+
+class EvaluationCritique(BaseModel):
+    critique: str = Field(..., description="犀利的評語")
+
+
+class EvaluationAdvice(BaseModel):
+    advice: str = Field(..., description="給用戶的引導建議")
+    missing_fields: list[str] = Field(..., description="缺少的關鍵資訊欄位")
+
+
 class CrossSiloEvaluation(BaseModel):
     result: Optional[str] = Field(..., description="跨部門視角的見解")
     advice: Optional[str] = Field(..., description="給用戶的建議")
     score: int = Field(..., description="策略完整度分數 (0-100)")
 
 
+class DepartmentList(BaseModel):
+    departments: list[str] = Field(..., description="解決問題需要協作的相關部門名稱")
+
+
+class DepartmentPerspective(BaseModel):
+    department: str = Field(..., description="部門名稱")
+    resources: list[str] = Field(..., description="需要該部門提供的資源或能力")
+    example: str = Field(..., description="從主管職位出發的具體例子")
+
+
+class LadderQuestions(BaseModel):
+    questions: list[str] = Field(..., description="梯級分析往下生成的問題，由廣到窄排序")
+
+
+class ExportDecision(BaseModel):
+    wants_ppt: bool = Field(..., description="用戶是否同意製作 PPT 簡報")
+    reply: str = Field(..., description="給用戶的簡短回應")
+
+
+# evaluation 與 cross_silo 共用的及格分數
+PASSING_SCORE = 65
+
+
 class State(BaseModel):
     messages: Annotated[List[Any], add_messages]
    
@@ -56,6 +93,8 @@ class State(BaseModel):
             "missing_fields": [],
         }
     )
+    # 上次評估時 profile 各欄位的內容雜湊，用來判斷是否需要重新評估
+    evaluated_profile_hashes: dict = Field(default_factory=dict)
     cross_silo_evaluation: dict = Field(
         default_factory=lambda: {
             "result": "",
@@ -63,10 +102,20 @@ class State(BaseModel):
             "score": 0,
         }
     )
+    department_perspectives: list[dict] = Field(default_factory=list)
     job_title: Optional[str] = None
     is_passing_evaluation: bool = False
     node_status: str = "example"
     last_stage: str = "" # 用來記錄最後執行的節點名稱
     count_node_file_export: int = 0
+    degraded: bool = False  # 過載時走降載設定
+    what_if_requested: bool = False  # 這一輪要平行展開梯級分析的各個問題
+    intake_form: bool = False  # 這一輪的 profile 由表單或文件填入，直接評估
+    # 追問迴圈的次數與最近的追問，用來限制迴圈次數與偵測重複追問
+    loop_counts: dict = Field(default_factory=dict)
+    loop_questions: dict = Field(default_factory=dict)
+    escalated_loop: Optional[str] = None  # 這一輪結束的迴圈
+    # 目前分數最高的評估 (score, problem_profile, evaluation_result)
+    best_evaluation: dict = Field(default_factory=dict)
     hmw_output : Optional[str] = None
     final_summary: Optional[str] = None
\ No newline at end of file
@@ -1,9 +1,17 @@
-from typing import List
+import json
+import re
+from typing import IO, List, Optional, Tuple, Union
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from pptx import Presentation
+from pptx.presentation import Presentation as PresentationDocument
 from pydantic import BaseModel, Field
 
+from src.artifacts import digest, get_artifact_store
+
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
 
 class SlideContent(BaseModel):
     header: str = Field(description="該頁簡報的標題")
@@ -15,57 +23,98 @@ class PPTInput(BaseModel):
     slides: List[SlideContent] = Field(description="要生成的簡報頁面列表")
 
 
-@tool("generate_ppt", args_schema=PPTInput)
-def generate_ppt(filename: str, slides: List[SlideContent]) -> str:
+def build_presentation(
+    slides: List[SlideContent],
+    template: Optional[Union[str, IO[bytes], PresentationDocument]] = None,
+) -> PresentationDocument:
+    """將投影片內容排版成 Presentation，可指定樣板檔。
+
+    傳入已解析的 Presentation 時直接在上面加頁 (會修改該物件)。
+    """
+    if isinstance(template, PresentationDocument):
+        prs = template
+    else:
+        prs = Presentation(template)
+
+    for i, slide_content in enumerate(slides):
+        # 第一頁使用 Title Slide (layout index 0)，其他使用 Title and Content (layout index 1)
+        if i == 0:
+            slide_layout = prs.slide_layouts[0]
+            slide = prs.slides.add_slide(slide_layout)
+
+            # 設定標題 (Title)
+            if slide.shapes.title:
+                slide.shapes.title.text = slide_content.header
+
+            # 設定副標題 (Subtitle) - 位於 index 1
+            if len(slide.shapes.placeholders) > 1:
+                subtitle = slide.shapes.placeholders[1].text_frame
+                subtitle.clear()
+                for item in slide_content.items:
+                    p = subtitle.add_paragraph()
+                    p.text = item
+        else:
+            # 其他頁面使用 Title and Content
+            layout_index = 1
+            slide_layout = prs.slide_layouts[layout_index]
+            slide = prs.slides.add_slide(slide_layout)
+
+            # 設定標題
+            if slide.shapes.title:
+                slide.shapes.title.text = slide_content.header
+
+            # 設定內容
+            # 檢查是否有副標題/內容框 placeholder
+            if len(slide.shapes.placeholders) > 1:
+                tf = slide.shapes.placeholders[1].text_frame
+                # 清除預設內容(如果有的話)
+                tf.clear()
+
+                for item in slide_content.items:
+                    p = tf.add_paragraph()
+                    p.text = item
+                    p.level = 0  # 設定縮排層級
+
+    return prs
+
+
+def _safe_filename(filename: str) -> str:
+    """模型給的檔名只用於下載時顯示，去除路徑與特殊字元"""
+    name = re.sub(r"[^\w.-]+", "_", filename.replace("\\", "/").split("/")[-1])
+    return name.strip("._") or "strategy_report"
+
+
+@tool(
+    "generate_ppt", args_schema=PPTInput, response_format="content_and_artifact"
+)
+def generate_ppt(
+    filename: str, slides: List[SlideContent], config: RunnableConfig
+) -> Tuple[str, Optional[dict]]:
     """用來生成策略總結 PPT 的工具。
     能夠將內容分為多頁投影片，每頁包含標題與重點列表。
     """
     try:
-        prs = Presentation()
-
-        for i, slide_content in enumerate(slides):
-            # 第一頁使用 Title Slide (layout index 0)，其他使用 Title and Content (layout index 1)
-            if i == 0:
-                slide_layout = prs.slide_layouts[0]
-                slide = prs.slides.add_slide(slide_layout)
-
-                # 設定標題 (Title)
-                if slide.shapes.title:
-                    slide.shapes.title.text = slide_content.header
-
-                # 設定副標題 (Subtitle) - 位於 index 1
-                if len(slide.shapes.placeholders) > 1:
-                    subtitle = slide.shapes.placeholders[1].text_frame
-                    subtitle.clear()
-                    for item in slide_content.items:
-                        p = subtitle.add_paragraph()
-                        p.text = item
-            else:
-                # 其他頁面使用 Title and Content
-                layout_index = 1
-                slide_layout = prs.slide_layouts[layout_index]
-                slide = prs.slides.add_slide(slide_layout)
-
-                # 設定標題
-                if slide.shapes.title:
-                    slide.shapes.title.text = slide_content.header
-
-                # 設定內容
-                # 檢查是否有副標題/內容框 placeholder
-                if len(slide.shapes.placeholders) > 1:
-                    tf = slide.shapes.placeholders[1].text_frame
-                    # 清除預設內容(如果有的話)
-                    tf.clear()
-
-                    for item in slide_content.items:
-                        p = tf.add_paragraph()
-                        p.text = item
-                        p.level = 0  # 設定縮排層級
-
-        # 儲存
-        full_path = f"{filename}.pptx"
-        prs.save(full_path)
-
-        return f"成功生成多頁簡報檔案：{full_path}"
+        session_id = config.get("configurable", {}).get("session_id", "default")
+        content = json.dumps(
+            [slide.model_dump() for slide in slides],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+
+        # 以投影片內容定址，相同內容不重複排版與寫檔
+        artifact = get_artifact_store().put(
+            session_id,
+            digest(content),
+            lambda f: build_presentation(slides).save(f),
+            suffix=".pptx",
+        )
+
+        display_name = f"{_safe_filename(filename)}.pptx"
+        return f"成功生成多頁簡報檔案：{display_name}", {
+            "artifact_id": artifact.id,
+            "session_id": session_id,
+            "filename": display_name,
+            "mime": PPTX_MIME,
+        }
     except Exception as e:
-        return f"生成失敗：{str(e)}"
+        return f"生成失敗：{str(e)}", None
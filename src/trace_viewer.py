@@ -0,0 +1,146 @@
+"""Per-turn waterfall viewer for the JSONL traces written by src.tracing.
+
+Usage:
+    uv run python -m src.trace_viewer traces/traces_2026-01-01.jsonl            # 最後一輪
+    uv run python -m src.trace_viewer traces/... --trace <trace_id> --html out.html
+"""
+
+import argparse
+import html
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+BAR_WIDTH = 60
+KIND_COLORS = {
+    "turn": "#6c757d",
+    "node": "#0d6efd",
+    "route": "#adb5bd",
+    "llm": "#fd7e14",
+    "tool": "#198754",
+}
+
+
+def load_traces(path: str) -> Dict[str, List[dict]]:
+    traces: Dict[str, List[dict]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def ordered_rows(spans: List[dict]) -> List[tuple]:
+    """依父子關係做深度優先排序，回傳 (depth, span)"""
+    children: Dict[str, List[dict]] = defaultdict(list)
+    ids = {span["span_id"] for span in spans}
+    roots = []
+    for span in spans:
+        if span["parent_id"] in ids:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+
+    rows = []
+
+    def visit(span: dict, depth: int) -> None:
+        rows.append((depth, span))
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+            visit(child, depth + 1)
+
+    for root in sorted(roots, key=lambda s: s["start"]):
+        visit(root, 0)
+    return rows
+
+
+def _label(span: dict) -> str:
+    attrs = span.get("attributes", {})
+    extra = []
+    if attrs.get("route"):
+        extra.append(f"→ {attrs['route']}")
+    if attrs.get("completion_tokens") is not None:
+        extra.append(f"{attrs.get('prompt_tokens')}/{attrs['completion_tokens']} tok")
+    if attrs.get("cache_hit"):
+        extra.append("cache hit")
+    if attrs.get("error"):
+        extra.append(f"error: {attrs['error']}")
+    return " ".join([f"[{span['kind']}] {span['name']}", *extra])
+
+
+def render_text(spans: List[dict]) -> str:
+    start = min(s["start"] for s in spans)
+    total = max(s["end"] for s in spans) - start or 1e-9
+    lines = []
+    for depth, span in ordered_rows(spans):
+        offset = int((span["start"] - start) / total * BAR_WIDTH)
+        width = max(int(span["duration"] / total * BAR_WIDTH), 1)
+        bar = " " * offset + "█" * width
+        lines.append(
+            f"{bar:<{BAR_WIDTH + 1}} {span['duration'] * 1000:8.1f}ms "
+            f"{'  ' * depth}{_label(span)}"
+        )
+    return "\n".join(lines)
+
+
+def render_html(spans: List[dict]) -> str:
+    start = min(s["start"] for s in spans)
+    total = max(s["end"] for s in spans) - start or 1e-9
+    rows = []
+    for depth, span in ordered_rows(spans):
+        left = (span["start"] - start) / total * 100
+        width = max(span["duration"] / total * 100, 0.2)
+        color = KIND_COLORS.get(span["kind"], "#6f42c1")
+        title = html.escape(json.dumps(span["attributes"], ensure_ascii=False))
+        rows.append(
+            f'<div class="row"><div class="label" style="padding-left:{depth}em">'
+            f"{html.escape(_label(span))}</div>"
+            f'<div class="track"><div class="bar" title="{title}" '
+            f'style="left:{left:.3f}%;width:{width:.3f}%;background:{color}">'
+            f"{span['duration'] * 1000:.0f}ms</div></div></div>"
+        )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Turn waterfall</title>
+<style>
+body {{ font-family: sans-serif; font-size: 13px; }}
+.row {{ display: flex; align-items: center; height: 22px; }}
+.label {{ width: 420px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }}
+.track {{ position: relative; flex: 1; height: 16px; background: #f1f3f5; }}
+.bar {{ position: absolute; height: 16px; color: #fff; font-size: 11px;
+        overflow: hidden; white-space: nowrap; }}
+</style></head><body>
+<h3>Turn {html.escape(spans[0]["trace_id"][:12])} — {total * 1000:.0f}ms</h3>
+{"".join(rows)}
+</body></html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="JSONL trace file")
+    parser.add_argument("--trace", default=None, help="trace id (prefix); default: last")
+    parser.add_argument("--html", default=None, help="write an HTML waterfall here")
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    if not traces:
+        print("no traces found")
+        return
+    if args.trace:
+        matches = [t for t in traces if t.startswith(args.trace)]
+        if not matches:
+            print(f"trace {args.trace} not found")
+            return
+        spans = traces[matches[0]]
+    else:
+        spans = max(traces.values(), key=lambda s: max(x["end"] for x in s))
+
+    print(render_text(spans))
+    if args.html:
+        with open(args.html, "w", encoding="utf-8") as f:
+            f.write(render_html(spans))
+        print(f"waterfall written to {args.html}")
+
+
+if __name__ == "__main__":
+    main()
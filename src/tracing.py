@@ -0,0 +1,219 @@
+"""Span-based tracing of a turn, written to a local JSONL sink.
+
+以 LangChain callback 取得每個 run 的 run_id / parent_run_id，記錄以下 span：
+turn (整個 graph)、node (graph 節點)、route (路由函式)、llm (模型呼叫)、tool (工具呼叫)。
+中間的內部 runnable 不記錄，其子 span 會掛到最近的已記錄祖先。
+每個 span 一行 JSON，可用 `python -m src.trace_viewer` 畫出瀑布圖。
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config import config
+
+
+class TraceSink:
+    """將完成的 span 逐行附加到 JSONL 檔"""
+
+    def __init__(self, trace_dir: str):
+        self.trace_dir = trace_dir
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(
+            self.trace_dir, f"traces_{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+        )
+
+    def write(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, ensure_ascii=False, default=str)
+        with self._lock:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """把 LangChain callback 事件轉成 span"""
+
+    run_inline = True
+
+    def __init__(self, sink: TraceSink, attributes: Optional[Dict[str, Any]] = None):
+        self.sink = sink
+        self.attributes = attributes or {}
+        self.trace_id: Optional[str] = None
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+        # run_id -> 最近的已記錄 span id (自己或祖先)
+        self._resolved: Dict[UUID, Optional[str]] = {}
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: Optional[UUID],
+        kind: Optional[str],
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        parent_id = self._resolved.get(parent_run_id) if parent_run_id else None
+        if kind is None:
+            # 不記錄的內部 runnable，子 span 直接掛到祖先
+            self._resolved[run_id] = parent_id
+            return
+        if self.trace_id is None:
+            self.trace_id = run_id.hex
+        span_id = run_id.hex
+        self._resolved[run_id] = span_id
+        self._open[run_id] = {
+            "trace_id": self.trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "kind": kind,
+            "name": name,
+            "start": time.time(),
+            "attributes": {**(attributes or {})},
+        }
+
+    def _end(
+        self,
+        run_id: UUID,
+        attributes: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self._resolved.pop(run_id, None)
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        span["end"] = time.time()
+        span["duration"] = round(span["end"] - span["start"], 6)
+        span["attributes"].update(attributes or {})
+        if error is not None:
+            span["attributes"]["error"] = f"{type(error).__name__}: {error}"
+        self.sink.write(span)
+
+    # --- chains: turn / node / route ---
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        node = metadata.get("langgraph_node")
+        if parent_run_id is None:
+            kind = "turn"
+            attributes = dict(self.attributes)
+        elif name.startswith("route_") or name == "tools_condition":
+            kind = "route"
+            attributes = {"node": node}
+        elif node and name == node:
+            kind = "node"
+            attributes = {"node": node, "step": metadata.get("langgraph_step")}
+        else:
+            kind = attributes = None
+        self._start(run_id, parent_run_id, kind, name, attributes)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        attributes = {}
+        span = self._open.get(run_id)
+        if span is not None and span["kind"] == "route" and isinstance(outputs, str):
+            attributes["route"] = outputs
+        if span is not None and span["kind"] == "turn" and isinstance(outputs, dict):
+            attributes["last_stage"] = outputs.get("last_stage")
+        self._end(run_id, attributes)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, error=error)
+
+    # --- llm calls ---
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        invocation = kwargs.get("invocation_params") or {}
+        self._start(
+            run_id,
+            parent_run_id,
+            "llm",
+            metadata.get("ls_model_name") or invocation.get("model", "llm"),
+            {
+                "node": metadata.get("langgraph_node"),
+                "max_tokens": invocation.get("max_tokens"),
+            },
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        self._end(
+            run_id,
+            {
+                "prompt_tokens": usage.get("prompt_tokens"),
+                "completion_tokens": usage.get("completion_tokens"),
+                "cached_tokens": cached,
+                "cache_hit": bool(cached),
+            },
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, error=error)
+
+    # --- tool calls ---
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(
+            run_id,
+            parent_run_id,
+            "tool",
+            name,
+            {"node": (metadata or {}).get("langgraph_node")},
+        )
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end(run_id, error=error)
+
+
+trace_sink = TraceSink(config.trace_dir)
+
+
+def tracer_for_turn(session_id: str) -> Optional[TraceRecorder]:
+    """啟用追蹤時回傳這一輪的 recorder，否則回傳 None"""
+    if not config.trace_enabled:
+        return None
+    return TraceRecorder(trace_sink, {"session_id": session_id})
@@ -0,0 +1,138 @@
+"""Turn-level cancellation for sessions that send a new message mid-turn.
+
+每個 session 同一時間只有一個有效的 turn。新訊息進來時會取消舊 turn 仍在執行的
+graph task，且舊 turn 的結果不會寫回 session state；同時統計被取消的 LLM 呼叫與估計省下的 tokens。
+"""
+
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from src.logger import logger
+
+
+class LLMCallCounter(AsyncCallbackHandler):
+    """計算一個 turn 內開始、完成與失敗 (含被取消) 的 LLM 呼叫數及輸出 tokens"""
+
+    def __init__(self):
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.completion_tokens = 0
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs: Any) -> None:
+        self.started += 1
+
+    async def on_llm_start(self, serialized, prompts, **kwargs: Any) -> None:
+        self.started += 1
+
+    async def on_llm_end(self, response, **kwargs: Any) -> None:
+        self.finished += 1
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self.completion_tokens += usage.get("completion_tokens", 0)
+
+    async def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.failed += 1
+
+    @property
+    def in_flight(self) -> int:
+        return max(self.started - self.finished - self.failed, 0)
+
+
+@dataclass
+class Turn:
+    id: int
+    session_id: str
+    counter: LLMCallCounter = field(default_factory=LLMCallCounter)
+    task: Optional[asyncio.Task] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    cancelled: bool = False
+    committed: bool = False
+
+
+@dataclass
+class TurnStats:
+    turns_started: int = 0
+    turns_committed: int = 0
+    turns_cancelled: int = 0
+    llm_calls_cancelled: int = 0
+    tokens_saved_estimate: int = 0
+    completion_tokens: int = 0
+    llm_calls_finished: int = 0
+
+    @property
+    def avg_completion_tokens(self) -> float:
+        if not self.llm_calls_finished:
+            return 0.0
+        return self.completion_tokens / self.llm_calls_finished
+
+
+class TurnManager:
+    """追蹤每個 session 目前有效的 turn"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._current: Dict[str, Turn] = {}
+        self._lock = threading.Lock()
+        self.stats = TurnStats()
+
+    def begin(self, session_id: str) -> Turn:
+        """開始新 turn，並取消同一 session 仍在執行的舊 turn"""
+        with self._lock:
+            previous = self._current.get(session_id)
+            turn = Turn(id=next(self._ids), session_id=session_id)
+            self._current[session_id] = turn
+            self.stats.turns_started += 1
+        if previous is not None and not previous.committed:
+            self.cancel(previous)
+        return turn
+
+    def attach(self, turn: Turn, task: asyncio.Task) -> None:
+        """登記執行 turn 的 task，取消時才能中斷它"""
+        turn.task = task
+        turn.loop = task.get_loop()
+        if turn.cancelled:
+            turn.loop.call_soon_threadsafe(task.cancel)
+
+    def is_current(self, turn: Turn) -> bool:
+        with self._lock:
+            return self._current.get(turn.session_id) is turn and not turn.cancelled
+
+    def cancel(self, turn: Turn) -> None:
+        """取消 turn：中斷 task 並記錄被取消的 LLM 呼叫"""
+        with self._lock:
+            if turn.cancelled or turn.committed:
+                return
+            turn.cancelled = True
+            in_flight = turn.counter.in_flight
+            self.stats.turns_cancelled += 1
+            self.stats.llm_calls_cancelled += in_flight
+            self.stats.tokens_saved_estimate += int(
+                in_flight * self.stats.avg_completion_tokens
+            )
+        if turn.task is not None and not turn.task.done():
+            turn.loop.call_soon_threadsafe(turn.task.cancel)
+        logger.info(
+            f"Turn {turn.id} cancelled for session {turn.session_id}: "
+            f"{in_flight} in-flight LLM calls, stats={self.stats}"
+        )
+
+    def commit(self, turn: Turn, apply: Callable[[], None]) -> bool:
+        """只有仍為有效 turn 時才一次套用結果，避免舊結果覆蓋新狀態"""
+        with self._lock:
+            if self._current.get(turn.session_id) is not turn or turn.cancelled:
+                logger.info(f"Discarding stale result of turn {turn.id}")
+                return False
+            apply()
+            turn.committed = True
+            self.stats.turns_committed += 1
+            self.stats.llm_calls_finished += turn.counter.finished
+            self.stats.completion_tokens += turn.counter.completion_tokens
+            return True
+
+
+turn_manager = TurnManager()
@@ -0,0 +1,65 @@
+import pytest
+
+from src.intent import LEXICON, NO, NO_CHANGE, UNKNOWN, YES, IntentClassifier
+
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier(LEXICON, threshold=0.8)
+
+
+@pytest.mark.parametrize(
+    "text, intent",
+    [
+        ("好", YES),
+        ("好的謝謝", YES),
+        ("OK!", YES),
+        ("不用了", NO),
+        ("正確", NO_CHANGE),
+        ("沒有要補充", NO_CHANGE),
+        ("都正確喔", NO_CHANGE),
+    ],
+)
+def test_exact_matches(classifier, text, intent):
+    assert classifier.classify(text).intent == intent
+    assert classifier.classify(text).confidence == 1.0
+
+
+@pytest.mark.parametrize("text", ["不好", "不對", "不是", "不可以", "not ok"])
+def test_negated_yes_is_no(classifier, text):
+    result = classifier.classify(text, (YES, NO))
+    assert result.intent == NO
+    assert result.confidence == 1.0
+
+
+def test_exact_match_outside_candidates_is_unknown(classifier):
+    assert classifier.classify("正確", (YES, NO)).intent == UNKNOWN
+
+
+@pytest.mark.parametrize("text", ["需要", "要", "好", "有要補充", "還需要財務部的預算"])
+def test_cross_silo_additions_are_not_confirmations(classifier, text):
+    # cross_silo_evaluate 只接受 NO_CHANGE
+    assert classifier.decide("cross_silo_evaluate", text) != NO_CHANGE
+
+
+def test_long_replies_go_to_llm(classifier):
+    text = "好，不過我們還需要資訊部協助建立客戶流失的預警儀表板"
+    assert classifier.decide("file_export", text, (YES, NO)) is None
+
+
+def test_decisions_are_counted(classifier):
+    classifier.decide("file_export", "好", (YES, NO))
+    classifier.decide("file_export", "我想想看要不要做", (YES, NO))
+    assert classifier.decisions[("file_export", "local")] == 1
+    assert classifier.decisions[("file_export", "llm")] == 1
+
+
+@pytest.mark.parametrize("text", ["I know, go ahead", "ok now", "Go ahead now"])
+def test_english_negation_needs_a_whole_word(classifier, text):
+    result = classifier.classify(text, (YES, NO))
+    assert result.intent == YES
+
+
+@pytest.mark.parametrize("text", ["no thanks", "Not now", "don't"])
+def test_english_negations(classifier, text):
+    assert classifier.classify(text, (YES, NO)).intent == NO
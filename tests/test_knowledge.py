@@ -0,0 +1,49 @@
+import pytest
+
+from src.knowledge import KnowledgeIndex, ResourceEntry, department_key
+
+
+@pytest.fixture
+def index():
+    return KnowledgeIndex(
+        [
+            ResourceEntry("業務總監", "業務部", ["流失", "續約"], "業務部的續約名單"),
+            ResourceEntry("業務總監", "業務部", ["流失"], "業務部的流失分析"),
+            ResourceEntry("業務總監", "客服部", ["流失"], "客服部的抱怨紀錄"),
+            ResourceEntry("業務總監", "財務部", ["流失"], "財務部的營收報表"),
+            ResourceEntry("產品經理", "資訊部", ["報表"], "資訊部的報表系統"),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "name, key",
+    [
+        ("資訊部門", "資訊"),
+        ("資訊部", "資訊"),
+        (" IT 部 ", "資訊"),
+        ("IT Department", "資訊"),
+        ("人力資源處", "人資"),
+        ("客服中心", "客服"),
+    ],
+)
+def test_department_key(name, key):
+    assert department_key(name) == key
+
+
+@pytest.mark.parametrize("name", ["資訊部門", "IT", "資訊技術部"])
+def test_match_departments_normalizes_names(index, name):
+    assert index.match_departments(name) == {"資訊部"}
+
+
+def test_match_departments_unknown(index):
+    assert index.match_departments("法務部") == set()
+
+
+def test_department_filter_applies_before_top_k(index):
+    # 只看前 1 名時資訊部排不進去，指定部門時仍要找得到
+    assert [d for d, _ in index.lookup("業務總監", "流失 報表", k=1)] == ["業務部"]
+    matches = index.lookup("業務總監", "流失 報表", k=1, department="資訊部門")
+    assert [(d, [e.resource for e in entries]) for d, entries in matches] == [
+        ("資訊部", ["資訊部的報表系統"])
+    ]
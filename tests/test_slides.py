@@ -0,0 +1,43 @@
+from src.slides import report_to_slides
+
+REPORT = """# 在客戶流失率高的情境下，我們如何在半年內將流失率降到 8%？
+
+## 目標
+- 半年內將季流失率從 15% 降到 8%
+- 續約率提升到 90%
+
+## 實作步驟
+1. **成立跨部門小組**：
+   - 由業務、客服與資訊部各派一人
+2. **建立流失預警名單**：每週由資訊部提供高風險客戶
+3. **客服主動關懷**：針對名單內客戶安排回訪
+
+**結論**
+先從預警名單著手，三個月後檢視成效。
+"""
+
+
+def test_numbered_bold_lines_stay_under_their_section():
+    slides = report_to_slides(
+        REPORT, "在客戶流失率高的情境下，我們如何在半年內將流失率降到 8%？"
+    )
+    headers = [slide.header for slide in slides]
+    assert headers[1:] == ["目標", "實作步驟", "結論"]
+
+    steps = slides[2].items
+    assert steps[0] == "1. 成立跨部門小組"
+    assert steps[2] == "2. 建立流失預警名單：每週由資訊部提供高風險客戶"
+    assert steps[3] == "3. 客服主動關懷：針對名單內客戶安排回訪"
+
+
+def test_standalone_bold_line_is_a_header():
+    slides = report_to_slides(REPORT, "策略報告")
+    assert slides[-1].header == "結論"
+    assert slides[-1].items == ["先從預警名單著手，三個月後檢視成效。"]
+
+
+def test_long_sections_continue_on_the_next_slide():
+    report = "## 實作步驟\n" + "\n".join(f"{i}. 步驟 {i}" for i in range(1, 9))
+    slides = report_to_slides(report, "策略報告")
+    assert [slide.header for slide in slides[1:]] == ["實作步驟", "實作步驟（續）"]
+    assert slides[2].items == ["7. 步驟 7", "8. 步驟 8"]